@@ -1,3 +1,8 @@
+import sys
+import weakref
+from collections.abc import Callable
+from typing import Any
+
 from syntax import (
     Add,
     Assignment,
@@ -24,7 +29,6 @@ from syntax import (
     Number,
     PrintStmt,
     Program,
-    Statement,
     String,
     Subtract,
     TrueExpr,
@@ -33,96 +37,126 @@ from syntax import (
     WhileStmt,
 )
 
+# Any node of the syntax tree.
+type _Node = Declaration | Expression
+
+# The fragments a node prints as, in order: literal strings, and child nodes
+# that are printed in their place.
+type _Parts = tuple[str | _Node, ...]
+
+
+def _binary_handler(op: str) -> Callable[[Any], _Parts]:
+    # The "( op " prefix is built once per operator rather than emitted as
+    # three fragments on every visit, and interned so that all printed
+    # programs share the same string object.
+    prefix = sys.intern(f"( {op} ")
+    return lambda e: (prefix, e.lhs, " ", e.rhs, " )")
+
+
+def _print_block(s: BlockStmt) -> _Parts:
+    parts: list[str | _Node] = ["{ "]
+    for d in s.declarations:
+        parts += (d, "; ")
+    parts.append("}")
+    return tuple(parts)
+
+
+def _print_if(s: IfStmt) -> _Parts:
+    if s.else_branch:
+        return ("( if ", s.condition, " ", s.then_branch, " else ", s.else_branch, " )")
+    return ("( if ", s.condition, " ", s.then_branch, " )")
+
+
+def _print_var_decl(d: VarDecl) -> _Parts:
+    if d.expr:
+        return (f"( var {d.name} ", d.expr, " )")
+    return (f"( var {d.name} )",)
+
 
-def _print_binary_expression(op: str, lhs: Expression, rhs: Expression) -> str:
-    return f"( {op} {_print_expression(lhs)} {_print_expression(rhs)} )"
-
-
-def _print_expression(e: Expression) -> str:
-    match e:
-        case Number(value):
-            return str(value)
-        case String(value):
-            return f'"{value}"'
-        case TrueExpr():
-            return "true"
-        case FalseExpr():
-            return "false"
-        case Nil():
-            return "nil"
-        case Variable(name):
-            return name
-        case Grouping(expr):
-            return _print_expression(expr)
-        case EqualEqualExpr(lhs, rhs):
-            return _print_binary_expression("==", lhs, rhs)
-        case NotEqualExpr(lhs, rhs):
-            return _print_binary_expression("!=", lhs, rhs)
-        case LessThanExpr(lhs, rhs):
-            return _print_binary_expression("<", lhs, rhs)
-        case LessEqualExpr(lhs, rhs):
-            return _print_binary_expression("<=", lhs, rhs)
-        case GreaterThanExpr(lhs, rhs):
-            return _print_binary_expression(">", lhs, rhs)
-        case GreaterEqualExpr(lhs, rhs):
-            return _print_binary_expression(">=", lhs, rhs)
-        case Add(lhs, rhs):
-            return _print_binary_expression("+", lhs, rhs)
-        case Subtract(lhs, rhs):
-            return _print_binary_expression("-", lhs, rhs)
-        case Mult(lhs, rhs):
-            return _print_binary_expression("*", lhs, rhs)
-        case Div(lhs, rhs):
-            return _print_binary_expression("/", lhs, rhs)
-        case LogicalAnd(lhs, rhs):
-            return _print_binary_expression("and", lhs, rhs)
-        case LogicalOr(lhs, rhs):
-            return _print_binary_expression("or", lhs, rhs)
-        case Negative(expr):
-            return f"( - {_print_expression(expr)} )"
-        case LogicalNot(expr):
-            return f"( ! {_print_expression(expr)} )"
-        case Assignment(target, expr):
-            return f"( = {target} {_print_expression(expr)} )"
-        case _:
-            raise RuntimeError(f"Unknown expression: {e}")
-
-
-def _print_statement(s: Statement):
-    match s:
-        case PrintStmt(expr):
-            return f"( print {_print_expression(expr)} )"
-        case ExprStmt(expr):
-            return _print_expression(expr)
-        case BlockStmt(declarations):
-            if declarations:
-                inner = " ".join([f"{_print_declaration(d)};" for d in declarations])
-                return f"{{ {inner} }}"
-            else:
-                return "{ }"
-        case IfStmt(condition, then_branch, else_branch):
-            if else_branch:
-                return f"( if {_print_expression(condition)} {_print_statement(then_branch)} else {_print_statement(else_branch)} )"
-            else:
-                return f"( if {_print_expression(condition)} {_print_statement(then_branch)} )"
-        case WhileStmt(condition, body):
-            return f"( while {_print_expression(condition)} {_print_statement(body)} )"
-        case _:
-            raise RuntimeError(f"Unknown statement type: {s}")
-
-
-def _print_declaration(d: Declaration) -> str:
-    match d:
-        case VarDecl(name, expr):
-            if expr:
-                return f"( var {name} {_print_expression(expr)} )"
-            else:
-                return f"( var {name} )"
-        case Statement():
-            return _print_statement(d)
-        case _:
-            raise RuntimeError(f"Unknown declaration type: {d}")
+# Maps each node type, be it a declaration, statement or expression, to a
+# function returning its fragments. Looking up type(node) here is a single
+# dict access, where a match statement would try each class pattern in turn.
+_HANDLERS: dict[type[_Node], Callable[[Any], _Parts]] = {
+    VarDecl: _print_var_decl,
+    PrintStmt: lambda s: ("( print ", s.expr, " )"),
+    ExprStmt: lambda s: (s.expr,),
+    BlockStmt: _print_block,
+    IfStmt: _print_if,
+    WhileStmt: lambda s: ("( while ", s.condition, " ", s.body, " )"),
+    Number: lambda e: (e.text,),
+    String: lambda e: (f'"{e.value}"',),
+    TrueExpr: lambda e: ("true",),
+    FalseExpr: lambda e: ("false",),
+    Nil: lambda e: ("nil",),
+    Variable: lambda e: (e.name,),
+    Grouping: lambda e: (e.expr,),
+    EqualEqualExpr: _binary_handler(EqualEqualExpr.OP),
+    NotEqualExpr: _binary_handler(NotEqualExpr.OP),
+    LessThanExpr: _binary_handler(LessThanExpr.OP),
+    LessEqualExpr: _binary_handler(LessEqualExpr.OP),
+    GreaterThanExpr: _binary_handler(GreaterThanExpr.OP),
+    GreaterEqualExpr: _binary_handler(GreaterEqualExpr.OP),
+    Add: _binary_handler(Add.OP),
+    Subtract: _binary_handler(Subtract.OP),
+    Mult: _binary_handler(Mult.OP),
+    Div: _binary_handler(Div.OP),
+    LogicalAnd: _binary_handler(LogicalAnd.OP),
+    LogicalOr: _binary_handler(LogicalOr.OP),
+    Negative: lambda e: ("( - ", e.expr, " )"),
+    LogicalNot: lambda e: ("( ! ", e.expr, " )"),
+    Assignment: lambda e: (f"( = {e.target} ", e.expr, " )"),
+}
+
+
+def _emit(node: _Node, out: list[str]) -> None:
+    # The tree is walked iteratively with an explicit stack, appending the
+    # output fragments to out.
+    stack: list[str | _Node] = [node]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, str):
+            out.append(item)
+            continue
+        handler = _HANDLERS.get(type(item))
+        if handler is None:
+            raise RuntimeError(f"Unknown syntax node: {item}")
+        stack.extend(reversed(handler(item)))
 
 
 def print_program(p: Program) -> str:
-    return "\n".join([f"{_print_declaration(d)}" for d in p.decls]).rstrip()
+    # All fragments of the program are appended to one list, which is joined
+    # once at the end, instead of building a string for every node.
+    out: list[str] = []
+    for d in p.decls:
+        _emit(d, out)
+        out.append("\n")
+    return "".join(out).rstrip()
+
+
+# Printers returned by compile_printer(), keyed by id() of their program. An
+# entry is removed when its program is garbage collected, so a recycled id()
+# never maps to a stale printer.
+_COMPILED: dict[int, Callable[[], str]] = {}
+
+
+def compile_printer(p: Program) -> Callable[[], str]:
+    """
+    Returns a function that prints the given program, for callers that print
+    the same program repeatedly.
+
+    The printer prints the program as it is when compile_printer() is first
+    called for it: the tree is traversed once, and every call after that
+    returns the same string. The program must therefore not be changed after
+    that, or its printer, which is cached by id(), will return stale output.
+    """
+    if (cached := _COMPILED.get(id(p))) is not None:
+        return cached
+
+    s = print_program(p)
+
+    def printer() -> str:
+        return s
+
+    _COMPILED[id(p)] = printer
+    weakref.finalize(p, _COMPILED.pop, id(p), None)
+    return printer
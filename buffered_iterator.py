@@ -1,6 +1,9 @@
-from collections import deque
-from typing import Iterator
-from typing import Deque
+from typing import Iterator, cast
+
+# Returned by next() on the underlying iterator at the end of input, so that
+# reaching the end doesn't raise and catch a StopIteration. It also marks the
+# end of input in SingleBufferedIterator.
+_EOF = object()
 
 
 class BufferedIterator[T]:
@@ -14,10 +17,27 @@ class BufferedIterator[T]:
     would be returned from the buffer, either by next(), peek(), or eat().
     """
 
+    __slots__ = ("_bufsize", "_count", "_errs", "_head", "_iter", "_mask", "_vals")
+
     def __init__(self, iter: Iterator[T], bufsize: int = 1):
         self._iter = iter
         self._bufsize = bufsize
-        self._buffer: Deque[T | Exception] = deque()
+
+        # The buffer is a fixed-size ring, stored as two parallel lists: the
+        # elements, and the exception raised in place of an element (almost
+        # always None). Keeping exceptions separate means the common path
+        # needs no type check on the buffered element.
+        #
+        # The ring has a power-of-two number of slots, at least bufsize, so
+        # that indices wrap around with a bit mask instead of a modulo. At
+        # most bufsize slots are in use at any time.
+        slots = 1 << (bufsize - 1).bit_length()
+        self._mask = slots - 1
+        self._vals: list[T | None] = [None] * slots
+        self._errs: list[Exception | None] = [None] * slots
+        # Index of the first buffered slot, and the number of buffered slots.
+        self._head = 0
+        self._count = 0
 
         self._refill_buffer()
 
@@ -26,39 +46,53 @@ class BufferedIterator[T]:
         Loads elements from the iterator until the buffer is at the desired
         size, or until the end of the input has been reached.
         """
-        while len(self._buffer) < self._bufsize:
+        # The attributes used in the loop are bound to locals, and _count is
+        # written back once at the end.
+        it, vals, errs, mask = self._iter, self._vals, self._errs, self._mask
+        head, count, bufsize = self._head, self._count, self._bufsize
+        while count < bufsize:
+            i = (head + count) & mask
             try:
-                self._buffer.append(next(self._iter))
-            except StopIteration:
-                # End of input
-                return
+                val = next(it, _EOF)
             except Exception as e:
                 # Exceptions are added to the buffer, to be thrown in
                 # next() or peek().
-                self._buffer.append(e)
+                vals[i] = None
+                errs[i] = e
+            else:
+                if val is _EOF:
+                    break
+                vals[i] = cast(T, val)
+            count += 1
+        self._count = count
 
     def has_next(self) -> bool:
         """
         Returns True if there is still an element available to return with next(),
         False otherwise.
         """
-        return bool(self._buffer)
+        return self._count > 0
 
     def next(self) -> T:
         """
         Returns the next element. Raises StopIteration if no more elements are available.
         """
-        if not self._buffer:
+        if not self._count:
             raise StopIteration
 
-        result = self._buffer.popleft()
+        head = self._head
+        result = self._vals[head]
+        error = self._errs[head]
+        self._vals[head] = None
+        self._errs[head] = None
+        self._head = (head + 1) & self._mask
+        self._count -= 1
         self._refill_buffer()
 
-        match result:
-            case Exception():
-                raise result
-            case x:
-                return x
+        if error is not None:
+            raise error
+        # The slot holds a real element whenever no exception was stored.
+        return cast(T, result)
 
     def can_peek(self, pos: int = 0) -> bool:
         """
@@ -73,7 +107,7 @@ class BufferedIterator[T]:
             raise ValueError(
                 f"Invalid position: {pos}. It must be less than the buffer size {self._bufsize}."
             )
-        return pos < len(self._buffer)
+        return pos < self._count
 
     def peek(self, pos: int = 0) -> T:
         """
@@ -88,15 +122,28 @@ class BufferedIterator[T]:
             raise ValueError(
                 f"In valid position: {pos}. It must be less than the buffer size {self._bufsize}."
             )
-        if pos >= len(self._buffer):
+        if pos >= self._count:
             raise StopIteration
 
-        result = self._buffer[pos]
-        match result:
-            case Exception():
-                raise result
-            case x:
-                return x
+        i = (self._head + pos) & self._mask
+        error = self._errs[i]
+        if error is not None:
+            raise error
+        return cast(T, self._vals[i])
+
+    def peek_or[D](self, default: D) -> T | D:
+        """
+        Returns the element at the head of the iterator, like peek(), or
+        default if there are no more elements. This saves callers a separate
+        has_next() check on hot paths.
+        """
+        if not self._count:
+            return default
+        head = self._head
+        error = self._errs[head]
+        if error is not None:
+            raise error
+        return cast(T, self._vals[head])
 
     def eat(self, val: T) -> bool:
         """
@@ -115,7 +162,7 @@ class BufferedIterator[T]:
           if b.eat("x"):
             ...
         """
-        if not self._buffer:
+        if not self._count:
             return False
 
         if self.peek(0) == val:
@@ -123,3 +170,93 @@ class BufferedIterator[T]:
             return True
 
         return False
+
+
+class _ErrBox:
+    """
+    Holds an exception raised by the underlying iterator in place of an
+    element. Boxing it lets the buffer tell errors apart from elements with a
+    type(x) is _ErrBox identity check, which is much cheaper than an
+    isinstance() check against Exception on every element.
+    """
+
+    __slots__ = ("e",)
+
+    def __init__(self, e: Exception):
+        self.e = e
+
+
+class SingleBufferedIterator[T]:
+    """
+    A BufferedIterator specialized for a buffer size of 1, which is all the
+    parser needs for its token stream. Instead of a ring buffer, the single
+    buffered element is kept in one attribute, so next() and peek() need no
+    index arithmetic or element count bookkeeping.
+
+    The interface and the exception semantics are the same as those of
+    BufferedIterator with bufsize 1.
+    """
+
+    __slots__ = ("_iter", "_next")
+
+    def __init__(self, iter: Iterator[T]):
+        self._iter = iter
+        # The buffered element, an exception raised in its place, or _EOF.
+        self._next: T | _ErrBox | object = _EOF
+        self._refill_buffer()
+
+    def _refill_buffer(self) -> None:
+        try:
+            self._next = next(self._iter, _EOF)
+        except Exception as e:
+            self._next = _ErrBox(e)
+
+    def has_next(self) -> bool:
+        return self._next is not _EOF
+
+    def next(self) -> T:
+        result = self._next
+        if result is _EOF:
+            raise StopIteration
+        self._refill_buffer()
+        if type(result) is _ErrBox:
+            raise result.e
+        return cast(T, result)
+
+    def can_peek(self, pos: int = 0) -> bool:
+        if pos < 0:
+            raise ValueError(f"Invalid position: {pos}.")
+        if pos >= 1:
+            raise ValueError(
+                f"Invalid position: {pos}. It must be less than the buffer size 1."
+            )
+        return self._next is not _EOF
+
+    def peek(self, pos: int = 0) -> T:
+        if pos != 0:
+            # Raises the appropriate ValueError.
+            self.can_peek(pos)
+        result = self._next
+        if result is _EOF:
+            raise StopIteration
+        if type(result) is _ErrBox:
+            raise result.e
+        return cast(T, result)
+
+    def peek_or[D](self, default: D) -> T | D:
+        result = self._next
+        if result is _EOF:
+            return default
+        if type(result) is _ErrBox:
+            raise result.e
+        return cast(T, result)
+
+    def eat(self, val: T) -> bool:
+        if self._next is _EOF:
+            return False
+
+        if self.peek() == val:
+            self.next()
+            return True
+
+        return False
@@ -1,11 +1,17 @@
-from buffered_iterator import BufferedIterator
+from buffered_iterator import BufferedIterator, SingleBufferedIterator
 from diagnostics import Diagnostics
 from token_with_context import TokenWithContext
 from tokens import Token
 
 
 class BufferedScanner:
-    def __init__(self, bit: BufferedIterator[TokenWithContext]) -> None:
+    __slots__ = ("_bit",)
+
+    def __init__(
+        self,
+        bit: BufferedIterator[TokenWithContext]
+        | SingleBufferedIterator[TokenWithContext],
+    ) -> None:
         self._bit = bit
 
     def has_next(self) -> bool:
@@ -14,23 +20,38 @@ class BufferedScanner:
     def next(self) -> Token:
         if not self.has_next():
             raise StopIteration
-        return self._bit.next().t
+        return self._bit.next()[0]
 
     def can_peek(self, offset: int = 0) -> bool:
         return self._bit.can_peek(offset)
 
     def peek(self, offset: int = 0) -> Token:
-        return self._bit.peek(offset).t
+        return self._bit.peek(offset)[0]
 
     def eat(self, t: Token) -> bool:
-        if self._bit.has_next() and self._bit.peek().t == t:
+        # The parser calls this for nearly every token, so the head is read
+        # only once instead of going through has_next() and peek().
+        head = self._bit.peek_or(None)
+        if head is not None and head[0] == t:
+            self._bit.next()
+            return True
+
+        return False
+
+    def eat_type(self, cls: type[Token]) -> bool:
+        """
+        Like eat(), but consumes the next token if it is of type cls. This
+        spares the parser from building a token only to compare against it.
+        """
+        head = self._bit.peek_or(None)
+        if head is not None and type(head[0]) is cls:
             self._bit.next()
             return True
 
         return False
 
     def diagnostics(self) -> Diagnostics:
-        if self._bit.has_next():
-            return self._bit.peek().d
-        else:
+        head = self._bit.peek_or(None)
+        if head is None:
             raise StopIteration("Cannot get diagnostics past last token.")
+        return head[1]
@@ -0,0 +1,103 @@
+from dataclasses import dataclass
+
+from diagnostics import Diagnostics
+
+# Opcodes. Code is a flat list of ints in which every opcode is directly
+# followed by its argument, if it has one. Jump targets are offsets in that
+# list.
+
+# Loads and stores. The argument is an index into Code.consts, into
+# Code.names for global variables, or a slot number for local variables.
+CONST = 0  # Push a constant.
+LOAD_GLOBAL = 1  # Push the value of a variable.
+STORE_GLOBAL = 2  # Assign the top of the stack to a variable, keeping it there.
+DEFINE_GLOBAL = 3  # Pop a value and declare a variable.
+LOAD_LOCAL = 4
+STORE_LOCAL = 5
+DEFINE_LOCAL = 6
+
+# Operators. These pop their operands and push the result.
+NEG = 10
+NOT = 11
+ADD = 12
+SUB = 13
+MUL = 14
+DIV = 15
+LT = 16
+LE = 17
+GT = 18
+GE = 19
+EQ = 20
+NE = 21
+
+# Variants of the numeric operators above for operands that are known to be
+# numbers at compile time. They skip the type checks.
+NEG_NUM = 22
+ADD_NUM = 23
+SUB_NUM = 24
+MUL_NUM = 25
+DIV_NUM = 26  # Still checks for division by zero.
+LT_NUM = 27
+LE_NUM = 28
+GT_NUM = 29
+GE_NUM = 32
+
+# Variants of EQ and NE for operands that are known to have the same type at
+# compile time. They skip the type check.
+EQ_SAME = 33
+NE_SAME = 34
+
+# Checks, which raise an error if they fail and otherwise leave the stack as it
+# is. They check an operand before the next operand is evaluated, so that
+# evaluating it has no effect if the check fails.
+CHECK_NUM = 35  # Check that the top of the stack is a number.
+CHECK_GLOBAL = 36  # Check that a variable is declared. The argument is its name.
+
+# Short-circuit operators. The argument is the offset to jump to if the left
+# operand decides the result, which then replaces it on the stack. Otherwise
+# the left operand is popped and the right operand is evaluated.
+AND = 30
+OR = 31
+
+# Control flow. The argument of the jumps is the offset to jump to.
+JUMP = 40
+JUMP_IF_FALSY = 41  # Pop a value, and jump if it is nil or false.
+JUMP_IF_LOOP_DONE = 42  # Pop a while condition, and jump if the loop ends.
+HALT = 43  # Stop, returning the top of the stack, if any.
+
+# Statements.
+POP = 50
+PRINT = 51
+
+# Superinstructions, which do the work of a pair of the instructions above in
+# one dispatch. The *_CONST operators take a number constant as right operand,
+# like CONST followed by the operator. Their argument is the constant's index.
+ADD_CONST = 60
+SUB_CONST = 61
+MUL_CONST = 62
+DIV_CONST = 63  # The constant is never zero.
+LT_CONST = 64
+LE_CONST = 65
+GT_CONST = 66
+GE_CONST = 67
+STORE_GLOBAL_POP = 68  # Like STORE_GLOBAL followed by POP.
+
+
+@dataclass(slots=True)
+class Code:
+    """
+    Compiled code, as produced by the compiler and run by vm.run().
+    """
+
+    # The instructions.
+    ops: list[int]
+    # The number of slots for local variables.
+    n_locals: int
+    # The constants and variable names referred to by the instructions.
+    consts: list[float | bool | str | None]
+    names: list[str]
+    # The diagnostics for the instructions that can fail, keyed by the offset
+    # of the instruction. These are only looked at to report an error. The
+    # operator instructions that check the types of their operands have the
+    # diagnostics of each operand; all others have just one.
+    diags: dict[int, tuple[Diagnostics, ...]]
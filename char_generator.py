@@ -1,28 +1,47 @@
-from dataclasses import dataclass
+from array import array
+from itertools import accumulate
 from typing import Iterator
-from diagnostics import Diagnostics, Pos
 
 
-@dataclass
-class ReadCharState:
+def scan_chars(line_iter: Iterator[str]) -> tuple[str, array[int], list[str]]:
     """
-    Represents a read character with its diagnostic state. This is stored in
-    the char reader's buffer.
-    """
-
-    char: str
-    diags: Diagnostics
+    Reads all lines from an iterator of lines and lays the characters out
+    flat, for the char reader to index into. The lines may or may not contain
+    trailing newlines; if they do, the newlines are characters like any other.
 
+    Returns a tuple of:
+      text:         All lines concatenated into one string.
+      line_starts:  The offset in text at which each line starts. The entry
+                    for line number n is at index n - 1. The line and column
+                    of a character are found by bisecting this array.
+      lines:        The lines as read, indexed by line number (index 0 is
+                    unused). These are shown in diagnostics.
 
-def char_generator(line_iter: Iterator[str]) -> Iterator[ReadCharState]:
+    Compared to producing one object per character, this allocates only a
+    handful of objects per line, and diagnostic information is only turned
+    into Diagnostics objects when it is actually asked for. The loops over
+    the lines all run in C: list.extend(), str.join() and accumulate().
     """
-    Returns a generator that produces successive characters from an iterator
-    of lines. The lines may or may not contain trailing newlines; if they do,
-    the newlines are returned like any other character.
+    lines = [""]
+    lines.extend(line_iter)
+    # Running sum of the line lengths, starting at 0. The last entry is the
+    # end of the text rather than the start of a line, so it is dropped.
+    line_starts = array("l", accumulate(map(len, lines[1:]), initial=0))
+    line_starts.pop()
+    return "".join(lines), line_starts, lines
 
-    The returned characters are encapsulated together with diagnostic state
-    in a _ReadCharState object.
+
+def scan_text(text: str) -> tuple[str, array[int], list[str]]:
+    """
+    Like scan_chars(), but for input that is already a single string. The
+    text is used as is, and line boundaries are located with str.find()
+    instead of requiring the caller to split the text into lines first.
     """
-    for i, line in enumerate(line_iter):
-        for j, char in enumerate(line):
-            yield ReadCharState(char, Diagnostics(Pos(i + 1, j + 1), line.rstrip()))
+    line_starts = array("l", [0])
+    pos = text.find("\n")
+    while pos != -1:
+        line_starts.append(pos + 1)
+        pos = text.find("\n", pos + 1)
+    lines = [""]
+    lines.extend(text.split("\n"))
+    return text, line_starts, lines
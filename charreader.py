@@ -1,18 +1,22 @@
+import re
+from array import array
+from bisect import bisect_right
 from typing import Iterator
 
-from buffered_iterator import BufferedIterator
+from char_generator import scan_chars, scan_text
 from diagnostics import Diagnostics, Pos
-from char_generator import ReadCharState, char_generator
 
 
 class CharReader:
     """
-    A two-character buffered reader to read characters from successive lines.
-    Offers a peek() functionality for lookahead, with a configurable buffer
-    length, depending on how much lookahead is needed.
+    A reader to read characters from successive lines. Offers a peek()
+    functionality for lookahead.
+
+    The whole input is read when the reader is created, and characters are
+    then read by indexing into one flat string.
     """
 
-    _BUFSIZE = 2
+    __slots__ = ("_len", "_line_starts", "_lines", "_pos", "_text")
 
     def __init__(self, line_iter: Iterator[str]):
         """
@@ -21,32 +25,41 @@ class CharReader:
         Arguments:
           line_iter:    An iterator yielding successive lines of input, for
                         example from a file.
-          bufsize:      Size of the buffer. The charreader keps reading
-                        characters until the buffer is full or the end of the
-                        input has been reached. When a character is read from
-                        the buffer, the next character is read and appended to
-                        the end of the buffer (queue).
+        """
+        self._init_state(*scan_chars(line_iter))
 
+    @classmethod
+    def from_string(cls, text: str) -> "CharReader":
         """
+        Creates a new CharReader that reads the given text. Lines are
+        separated by the newline characters in the text.
+        """
+        reader = cls.__new__(cls)
+        reader._init_state(*scan_text(text))
+        return reader
 
+    def _init_state(self, text: str, line_starts: array[int], lines: list[str]):
         ########################################################################
         # Class state and invariants
         ########################################################################
 
-        # Adds buffering to the given character generator, for peeking etc.
-        self._buffer: BufferedIterator[ReadCharState] = BufferedIterator(
-            char_generator(line_iter), CharReader._BUFSIZE
-        )
-
-        # This stores the diagnostic state of the latest character successfully
-        # read from the input. We keep this explicitly to support the case
-        # where the end of the input has been reached, the buffer has been
-        # emptied, but we still need this info. This is normally for the error
-        # "unexpected end of input: …".
-        #
-        # If this is None, it means we never read any input, i.e., the given
-        # input was empty.
-        self._last_processed_state: Diagnostics | None = None
+        # The input text, and the start offsets and contents of its lines,
+        # used to build diagnostics.
+        self._text = text
+        self._line_starts = line_starts
+        self._lines = lines
+        self._len = len(text)
+
+        # Index of the next character to return in _text. All characters
+        # before this index have been read.
+        self._pos = 0
+
+    def _diagnostics_at(self, pos: int, col_offset: int = 0) -> Diagnostics:
+        # Empty lines start at the same offset as the line after them, so
+        # bisect_right() finds the line that actually contains pos.
+        line_no = bisect_right(self._line_starts, pos)
+        col_no = pos - self._line_starts[line_no - 1] + 1 + col_offset
+        return Diagnostics(Pos(line_no, col_no), self._lines[line_no])
 
     def diagnostics(self) -> Diagnostics:
         """
@@ -60,14 +73,13 @@ class CharReader:
         If there are no more characters to return, the method returns the
         diagnostic information for the last read character, so you can use it
         in errors like "unexpected end of input".
-
-        Note that once a character is returned by next(), the diagnostic
-        information is lost (unless it was the last character available).
         """
-        if self._buffer.has_next():
-            return self._buffer.peek(0).diags
-        elif self._last_processed_state:
-            return self._last_processed_state.next_col()
+        if self._pos < self._len:
+            return self._diagnostics_at(self._pos)
+        elif self._pos > 0:
+            # Point just past the last character, built directly rather than
+            # through next_col(), which would allocate twice.
+            return self._diagnostics_at(self._pos - 1, 1)
         else:
             return Diagnostics(Pos(0, 0), "(no input)")
 
@@ -76,19 +88,18 @@ class CharReader:
         Returns the next character and advances to the next character.
         Raises StopIteration if there are no more characters.
         """
-        if not self._buffer.has_next():
-            # Empty buffer, nothing to return.
+        pos = self._pos
+        if pos >= self._len:
             raise StopIteration
 
-        result = self._buffer.next()
-        self._last_processed_state = result.diags
-        return result.char
+        self._pos = pos + 1
+        return self._text[pos]
 
     def has_next(self) -> bool:
         """
         Returns True if there is still a character to read, false otherwise.
         """
-        return self._buffer.has_next()
+        return self._pos < self._len
 
     def can_peek(self, offset=0) -> bool:
         """
@@ -98,7 +109,9 @@ class CharReader:
         can_peek(offset) is false, then peek(offset) would throw a
         StopIteration exception.
         """
-        return self._buffer.can_peek(offset)
+        if offset < 0:
+            raise ValueError(f"Invalid position: {offset}.")
+        return self._pos + offset < self._len
 
     def peek(self, offset=0) -> str:
         """
@@ -106,7 +119,35 @@ class CharReader:
         without advancing. Raises StopIteration if there is no more character
         to read.
         """
-        return self._buffer.peek(offset).char
+        if offset < 0:
+            raise ValueError(f"Invalid position: {offset}.")
+        pos = self._pos + offset
+        if pos >= self._len:
+            raise StopIteration
+        return self._text[pos]
+
+    def read_match(self, pattern: re.Pattern[str]) -> re.Match[str] | None:
+        """
+        Matches pattern at the current position. If it matches, consumes the
+        matched characters and returns the match. Otherwise, returns None and
+        consumes nothing.
+
+        This lets the scanner consume runs of characters, such as whitespace
+        or an entire token, in a single call, with the loop over the
+        characters running inside the regular expression engine.
+        """
+        m = pattern.match(self._text, self._pos)
+        if m is not None:
+            self._pos = m.end()
+        return m
+
+    def read_run(self, pattern: re.Pattern[str]) -> str:
+        """
+        Like read_match(), but returns the consumed characters, or "" if
+        pattern doesn't match.
+        """
+        m = self.read_match(pattern)
+        return "" if m is None else m.group()
 
     def eat(self, c: str) -> bool:
         """
@@ -119,13 +160,10 @@ class CharReader:
         This is just an ergonomic improvement so that one doesn't have to
         always first call peek() and then next().
         """
-        if len(c) != 1:
-            raise ValueError(f"eat() requires exactly one character. Found: {c}")
-        if not self._buffer.has_next():
-            return False
-
-        if self.peek() == c:
-            self.next()
+        # Checked only in debug runs, as this is called per character.
+        assert len(c) == 1, f"eat() requires exactly one character. Found: {c}"
+        if self._pos < self._len and self._text[self._pos] == c:
+            self._pos += 1
             return True
 
         return False
@@ -0,0 +1,608 @@
+from collections.abc import Callable, Generator
+from typing import Any
+
+from bytecode import (
+    ADD,
+    ADD_CONST,
+    ADD_NUM,
+    AND,
+    CHECK_GLOBAL,
+    CHECK_NUM,
+    CONST,
+    DEFINE_GLOBAL,
+    DEFINE_LOCAL,
+    DIV,
+    DIV_CONST,
+    DIV_NUM,
+    EQ,
+    EQ_SAME,
+    GE,
+    GE_CONST,
+    GE_NUM,
+    GT,
+    GT_CONST,
+    GT_NUM,
+    HALT,
+    JUMP,
+    JUMP_IF_FALSY,
+    JUMP_IF_LOOP_DONE,
+    LE,
+    LE_CONST,
+    LE_NUM,
+    LOAD_GLOBAL,
+    LOAD_LOCAL,
+    LT,
+    LT_CONST,
+    LT_NUM,
+    MUL,
+    MUL_CONST,
+    MUL_NUM,
+    NE,
+    NE_SAME,
+    NEG,
+    NEG_NUM,
+    NOT,
+    OR,
+    POP,
+    PRINT,
+    STORE_GLOBAL,
+    STORE_GLOBAL_POP,
+    STORE_LOCAL,
+    SUB,
+    SUB_CONST,
+    SUB_NUM,
+    Code,
+)
+from diagnostics import Diagnostics
+from syntax import (
+    Add,
+    Assignment,
+    BlockStmt,
+    Declaration,
+    Div,
+    EqualEqualExpr,
+    Expression,
+    ExprStmt,
+    FalseExpr,
+    GreaterEqualExpr,
+    GreaterThanExpr,
+    Grouping,
+    IfStmt,
+    LessEqualExpr,
+    LessThanExpr,
+    LogicalAnd,
+    LogicalNot,
+    LogicalOr,
+    Mult,
+    Negative,
+    Nil,
+    NotEqualExpr,
+    Number,
+    PrintStmt,
+    Program,
+    String,
+    Subtract,
+    TrueExpr,
+    VarDecl,
+    Variable,
+    WhileStmt,
+)
+from vm import TypeError, Value, run
+
+# The unchecked variant of each operator that has one.
+_NUMERIC_VARIANTS = {
+    NEG: NEG_NUM,
+    ADD: ADD_NUM,
+    SUB: SUB_NUM,
+    MUL: MUL_NUM,
+    DIV: DIV_NUM,
+    LT: LT_NUM,
+    LE: LE_NUM,
+    GT: GT_NUM,
+    GE: GE_NUM,
+}
+
+# The operators that check that both operands are numbers.
+_NUMERIC_OPERATORS = {SUB, MUL, DIV, LT, LE, GT, GE}
+
+# The superinstruction for each operator with a number constant as right
+# operand.
+_CONST_VARIANTS = {
+    ADD: ADD_CONST,
+    SUB: SUB_CONST,
+    MUL: MUL_CONST,
+    DIV: DIV_CONST,
+    LT: LT_CONST,
+    LE: LE_CONST,
+    GT: GT_CONST,
+    GE: GE_CONST,
+}
+
+# The instruction that also pops the value, for each store.
+_POPPING_STORES = {STORE_LOCAL: DEFINE_LOCAL, STORE_GLOBAL: STORE_GLOBAL_POP}
+
+# The static type of an expression: the type its value is known to have at
+# compile time, or None if it isn't known.
+type _StaticType = type | None
+
+# The compilation of an operator. It yields each operand to be compiled, is
+# sent back the operand's static type, and returns the operator's static type.
+type _Compilation = Generator[Expression, _StaticType, _StaticType]
+
+# The node types of literals, with their values, and of the operators with one
+# and two operands, with their opcodes. An operator is pure, that is, always
+# evaluates to the same value without side effects, if its operands are.
+_LITERALS: dict[type[Expression], Callable[[Any], Value]] = {
+    Number: lambda e: e.value,
+    String: lambda e: e.value,
+    TrueExpr: lambda e: True,
+    FalseExpr: lambda e: False,
+    Nil: lambda e: None,
+}
+_UNARY_OPERATORS: dict[type[Expression], int | None] = {
+    Grouping: None,
+    Negative: NEG,
+    LogicalNot: NOT,
+}
+_BINARY_OPERATORS: dict[type[Expression], int] = {
+    Mult: MUL,
+    Div: DIV,
+    Add: ADD,
+    Subtract: SUB,
+    LessThanExpr: LT,
+    LessEqualExpr: LE,
+    GreaterThanExpr: GT,
+    GreaterEqualExpr: GE,
+    EqualEqualExpr: EQ,
+    NotEqualExpr: NE,
+    LogicalAnd: AND,
+    LogicalOr: OR,
+}
+
+
+class _Compiler:
+    def __init__(self) -> None:
+        self._code = Code([], 0, [], [], {})
+        # The value of each expression evaluated at compile time so far, as
+        # returned by _constant(), keyed by the id() of its node, so that each
+        # node is evaluated only once.
+        self._constants: dict[int, tuple[Value] | None] = {}
+        # Where each constant and name is in _code.consts and _code.names. The
+        # type is part of the key for constants, as true == 1.0 in Python.
+        self._const_indices: dict[tuple[type, object], int] = {}
+        self._name_indices: dict[str, int] = {}
+        # The slot of each local variable, for each enclosing block from the
+        # outermost to the innermost. Variables declared outside any block are
+        # global, and are looked up by name at run time.
+        self._blocks: list[dict[str, int]] = []
+        # The global variables declared by the code compiled so far. As only
+        # blocks can contain a declaration, these are declared unconditionally
+        # before the code that follows runs.
+        self._globals: set[str] = set()
+        # The offsets of the last instruction emitted, and of the last
+        # instruction that is the target of a jump, used to fuse instructions.
+        self._last = -1
+        self._target = -1
+        # The number of slots used by the enclosing blocks. A block's slots
+        # are reused by the blocks that follow it.
+        self._n_slots = 0
+
+    def _emit(self, op: int, *diags: Diagnostics) -> int:
+        """
+        Appends an instruction without argument and returns its offset.
+        """
+        offset = self._last = len(self._code.ops)
+        self._code.ops.append(op)
+        if diags:
+            self._code.diags[offset] = diags
+        return offset
+
+    def _emit_arg(self, op: int, arg: int, *diags: Diagnostics) -> int:
+        """
+        Appends an instruction with an argument and returns its offset.
+        """
+        offset = self._emit(op, *diags)
+        self._code.ops.append(arg)
+        return offset
+
+    def _label(self) -> int:
+        """
+        Returns the offset of the next instruction to be emitted, which is
+        then the target of a jump.
+        """
+        self._target = len(self._code.ops)
+        return self._target
+
+    def _patch_jump(self, offset: int) -> None:
+        """
+        Makes the jump at offset go to the next instruction to be emitted.
+        """
+        self._code.ops[offset + 1] = self._label()
+
+    def _fusable(self) -> int | None:
+        """
+        Returns the offset of the last instruction emitted, if it can be fused
+        with the next one. That is not the case if a jump goes to the next
+        one.
+        """
+        if self._last < 0 or self._target == len(self._code.ops):
+            return None
+        return self._last
+
+    def _const(self, value: float | bool | str | None) -> int:
+        key = (type(value), value)
+        if (index := self._const_indices.get(key)) is None:
+            index = self._const_indices[key] = len(self._code.consts)
+            self._code.consts.append(value)
+        return index
+
+    def _name(self, name: str) -> int:
+        if (index := self._name_indices.get(name)) is None:
+            index = self._name_indices[name] = len(self._code.names)
+            self._code.names.append(name)
+        return index
+
+    def _resolve(self, name: str) -> int | None:
+        """
+        Returns the slot of the local variable name, or None if name refers to
+        a global variable.
+        """
+        for block in reversed(self._blocks):
+            if (slot := block.get(name)) is not None:
+                return slot
+        return None
+
+    def _load_const(self, value: float | bool | str | None) -> _StaticType:
+        self._emit_arg(CONST, self._const(value))
+        return type(value)
+
+    def _grouping(self, e: Grouping) -> _Compilation:
+        return (yield e.expr)
+
+    def _unary(self, op: int, e: Any) -> _Compilation:
+        if (yield e.expr) is float and op == NEG:
+            self._emit(NEG_NUM)
+        else:
+            self._emit(op, e.expr.diag)
+        return float if op == NEG else bool
+
+    def _is_inert(self, e: Expression) -> bool:
+        """
+        Returns whether evaluating e can neither fail nor have side effects,
+        so that evaluating it earlier or later is not observable.
+        """
+        if type(e) is Variable:
+            return e.name in self._globals or self._resolve(e.name) is not None
+        return self._constant(e) is not None
+
+    def _binary(self, op: int, e: Any) -> _Compilation:
+        lhs_type = yield e.lhs
+        if (
+            op in _NUMERIC_OPERATORS
+            and lhs_type is not float
+            and not self._is_inert(e.rhs)
+        ):
+            # The left operand must be rejected before the right operand is
+            # evaluated, as the right operand could fail or assign a variable.
+            self._emit(CHECK_NUM, e.lhs.diag)
+            lhs_type = float
+        rhs_type = yield e.rhs
+        ops = self._code.ops
+        last = self._fusable()
+        if (
+            op in _CONST_VARIANTS
+            and last is not None
+            and ops[last] == CONST
+            and type(value := self._code.consts[ops[last + 1]]) is float
+            and not (op == DIV and value == 0)
+        ):
+            # The right operand is a number constant, so only the left operand
+            # needs to be checked.
+            index = ops[last + 1]
+            del ops[last:]
+            self._emit_arg(
+                _CONST_VARIANTS[op], index, e.diag if op == ADD else e.lhs.diag
+            )
+        elif lhs_type is float and rhs_type is float and op in _NUMERIC_VARIANTS:
+            # Only division can still fail, on a zero right operand.
+            self._emit(_NUMERIC_VARIANTS[op], e.lhs.diag, e.rhs.diag)
+        elif op in (EQ, NE) and lhs_type is not None and lhs_type is rhs_type:
+            self._emit(EQ_SAME if op == EQ else NE_SAME)
+        elif op in (ADD, EQ, NE):
+            # These accept operands of several types, and report an error at
+            # the operator if the types don't match.
+            self._emit(op, e.diag)
+        else:
+            self._emit(op, e.lhs.diag, e.rhs.diag)
+
+        if op in (SUB, MUL, DIV):
+            return float
+        if op == ADD:
+            return lhs_type if lhs_type is rhs_type else None
+        return bool
+
+    def _short_circuit(self, op: int, e: Any) -> _Compilation:
+        if constant := self._constant(e.lhs):
+            # The left operand is known, so either it decides the result, or
+            # the result is the right operand. Uses the truthiness of the VM.
+            if bool(constant[0]) == (op == OR):
+                return self._load_const(op == OR)
+            return (yield e.rhs)
+
+        yield e.lhs
+        jump = self._emit_arg(op, 0)
+        yield e.rhs
+        self._patch_jump(jump)
+        return None
+
+    def _variable(self, e: Variable) -> _StaticType:
+        if (slot := self._resolve(e.name)) is not None:
+            self._emit_arg(LOAD_LOCAL, slot)
+        else:
+            self._emit_arg(LOAD_GLOBAL, self._name(e.name), e.diag)
+        return None
+
+    def _assignment(self, e: Assignment) -> _Compilation:
+        slot = self._resolve(e.target)
+        if (
+            slot is None
+            and e.target not in self._globals
+            and not self._is_inert(e.expr)
+        ):
+            # An undeclared variable must be reported before the value is
+            # evaluated, as the value could fail or assign a variable.
+            self._emit_arg(CHECK_GLOBAL, self._name(e.target), e.expr.diag)
+        static_type = yield e.expr
+        if slot is not None:
+            self._emit_arg(STORE_LOCAL, slot)
+        else:
+            self._emit_arg(STORE_GLOBAL, self._name(e.target), e.expr.diag)
+        return static_type
+
+    def _fold(self, e: Any, operands: list[tuple[Value] | None]) -> tuple[Value] | None:
+        # Evaluates the operator e from the values of its operands.
+        t = type(e)
+        if t is LogicalAnd or t is LogicalOr:
+            # The left operand can decide the result on its own. Uses the
+            # truthiness of the VM.
+            if operands[0] is None:
+                return None
+            if bool(operands[0][0]) == (t is LogicalOr):
+                return (t is LogicalOr,)
+            return operands[1]
+        values = [o[0] for o in operands if o is not None]
+        if len(values) < len(operands):
+            return None
+        op = _UNARY_OPERATORS[t] if len(operands) == 1 else _BINARY_OPERATORS[t]
+        if op is None:
+            return operands[0]  # A grouping.
+        # Runs the operator alone on its operands. The diagnostics are only
+        # there for the VM to build its error, which is dropped.
+        code = Code([], 0, values, [], {})
+        for i in range(len(values)):
+            code.ops += [CONST, i]
+        code.diags[len(code.ops)] = (e.diag, e.diag)
+        code.ops += [op, HALT]
+        try:
+            return (run(code, {}),)
+        except TypeError:
+            return None
+
+    def _constant(self, e: Expression) -> tuple[Value] | None:
+        """
+        Evaluates a pure expression at compile time. Returns its value, in a
+        tuple as the value can be None, or None if e isn't pure or evaluating
+        it fails. The error is then left to happen at run time, if the
+        expression is ever evaluated.
+
+        Each operator is evaluated once, from the values of its operands,
+        rather than by evaluating its whole subtree again. That way, a large
+        pure expression that fails costs no more than one that doesn't.
+        """
+        constants = self._constants
+        # The expressions to evaluate, each after its operands, which are
+        # pushed on top of it.
+        todo: list[Any] = [e]
+        while todo:
+            node = todo[-1]
+            if id(node) in constants:
+                todo.pop()
+                continue
+            t = type(node)
+            if t in _UNARY_OPERATORS:
+                operands = (node.expr,)
+            elif t in _BINARY_OPERATORS:
+                operands = (node.lhs, node.rhs)
+            else:
+                todo.pop()
+                literal = _LITERALS.get(t)
+                constants[id(node)] = None if literal is None else (literal(node),)
+                continue
+            unevaluated = [o for o in operands if id(o) not in constants]
+            if unevaluated:
+                todo.extend(unevaluated)
+                continue
+            todo.pop()
+            constants[id(node)] = self._fold(node, [constants[id(o)] for o in operands])
+        return constants[id(e)]
+
+    def _begin(self, e: Expression) -> _StaticType | _Compilation:
+        # Compiles e if it has no operands to compile, and returns its static
+        # type. Otherwise, returns its compilation.
+        if type(e) not in _LITERALS and (constant := self._constant(e)):
+            return self._load_const(constant[0])
+
+        handler = _EXPRESSIONS.get(type(e))
+        if handler is None:
+            raise RuntimeError(f"Don't know how to compile expression {e!r}")
+        return handler(self, e)
+
+    def expression(self, e: Expression) -> _StaticType:
+        """
+        Compiles an expression, and returns its static type. A pure expression
+        is compiled to its value.
+
+        Operands are compiled by this loop rather than by recursive calls, so
+        that deeply nested expressions, such as a long chain of additions,
+        can't exhaust the Python stack.
+        """
+        # The compilations waiting for an operand, innermost last.
+        pending: list[_Compilation] = []
+        result = self._begin(e)
+        while True:
+            if isinstance(result, Generator):
+                pending.append(result)
+                sent = None
+            elif pending:
+                sent = result
+            else:
+                return result
+            try:
+                result = self._begin(pending[-1].send(sent))
+            except StopIteration as done:
+                pending.pop()
+                result = done.value
+
+    def _var_decl(self, d: VarDecl) -> None:
+        if d.expr is None:
+            self._load_const(None)
+        else:
+            self.expression(d.expr)
+        # The variable is declared only after its initializer is compiled, so
+        # that the initializer sees any variable of the same name outside.
+        if not self._blocks:
+            self._emit_arg(DEFINE_GLOBAL, self._name(d.name))
+            self._globals.add(d.name)
+            return
+        block = self._blocks[-1]
+        if (slot := block.get(d.name)) is None:
+            # Redeclaring a variable in the same block reuses its slot.
+            slot = block[d.name] = self._n_slots
+            self._n_slots += 1
+            self._code.n_locals = max(self._code.n_locals, self._n_slots)
+        self._emit_arg(DEFINE_LOCAL, slot)
+
+    def _statement_expr(self, s: PrintStmt | ExprStmt, op: int) -> None:
+        # Evaluates the statement's expression, then consumes it with op.
+        self.expression(s.expr)
+        last = self._fusable()
+        if op == POP and last is not None and self._code.ops[last] in _POPPING_STORES:
+            # An assignment statement, which needn't keep the value.
+            self._code.ops[last] = _POPPING_STORES[self._code.ops[last]]
+        else:
+            self._emit(op)
+
+    def _block(self, s: BlockStmt) -> None:
+        self._blocks.append({})
+        for decl in s.declarations:
+            self.declaration(decl)
+        self._n_slots -= len(self._blocks.pop())
+
+    def _if(self, s: IfStmt) -> None:
+        if constant := self._constant(s.condition):
+            # Only the branch that is taken is compiled.
+            if constant[0] is None or constant[0] is False:
+                if s.else_branch:
+                    self.declaration(s.else_branch)
+            else:
+                self.declaration(s.then_branch)
+            return
+
+        self.expression(s.condition)
+        to_else = self._emit_arg(JUMP_IF_FALSY, 0)
+        self.declaration(s.then_branch)
+        if s.else_branch:
+            to_end = self._emit_arg(JUMP, 0)
+            self._patch_jump(to_else)
+            self.declaration(s.else_branch)
+            self._patch_jump(to_end)
+        else:
+            self._patch_jump(to_else)
+
+    def _while(self, s: WhileStmt) -> None:
+        constant = self._constant(s.condition)
+        if constant and constant[0] in (None, False):
+            return  # The body never runs.
+
+        start = self._label()
+        if constant:
+            # The loop never ends, so the condition needn't be evaluated.
+            self.declaration(s.body)
+            self._emit_arg(JUMP, start)
+            return
+        self.expression(s.condition)
+        to_end = self._emit_arg(JUMP_IF_LOOP_DONE, 0)
+        self.declaration(s.body)
+        self._emit_arg(JUMP, start)
+        self._patch_jump(to_end)
+
+    def declaration(self, d: Declaration) -> None:
+        handler = _DECLARATIONS.get(type(d))
+        if handler is None:
+            raise RuntimeError(f"Unsupported statement type: {type(d).__name__}")
+        handler(self, d)
+
+    def finish(self) -> Code:
+        self._emit(HALT)
+        return self._code
+
+
+# Maps each node type to the function compiling it. Like in the AST printer,
+# a dict lookup on type(node) replaces trying each class pattern of a match
+# statement in turn.
+_EXPRESSIONS: dict[
+    type[Expression], Callable[[_Compiler, Any], _StaticType | _Compilation]
+] = {
+    Number: lambda c, e: c._load_const(e.value),
+    String: lambda c, e: c._load_const(e.value),
+    TrueExpr: lambda c, e: c._load_const(True),
+    FalseExpr: lambda c, e: c._load_const(False),
+    Nil: lambda c, e: c._load_const(None),
+    Variable: _Compiler._variable,
+    Grouping: _Compiler._grouping,
+    Negative: lambda c, e: c._unary(NEG, e),
+    LogicalNot: lambda c, e: c._unary(NOT, e),
+    Mult: lambda c, e: c._binary(MUL, e),
+    Div: lambda c, e: c._binary(DIV, e),
+    Add: lambda c, e: c._binary(ADD, e),
+    Subtract: lambda c, e: c._binary(SUB, e),
+    LessThanExpr: lambda c, e: c._binary(LT, e),
+    LessEqualExpr: lambda c, e: c._binary(LE, e),
+    GreaterThanExpr: lambda c, e: c._binary(GT, e),
+    GreaterEqualExpr: lambda c, e: c._binary(GE, e),
+    EqualEqualExpr: lambda c, e: c._binary(EQ, e),
+    NotEqualExpr: lambda c, e: c._binary(NE, e),
+    LogicalAnd: lambda c, e: c._short_circuit(AND, e),
+    LogicalOr: lambda c, e: c._short_circuit(OR, e),
+    Assignment: _Compiler._assignment,
+}
+
+_DECLARATIONS: dict[type[Declaration], Callable[[_Compiler, Any], object]] = {
+    VarDecl: _Compiler._var_decl,
+    PrintStmt: lambda c, s: c._statement_expr(s, PRINT),
+    ExprStmt: lambda c, s: c._statement_expr(s, POP),
+    BlockStmt: _Compiler._block,
+    IfStmt: _Compiler._if,
+    WhileStmt: _Compiler._while,
+}
+
+
+def compile_expression(e: Expression) -> Code:
+    """
+    Compiles an expression. Running the code returns the expression's value.
+    """
+    c = _Compiler()
+    c.expression(e)
+    return c.finish()
+
+
+def compile_program(p: Program) -> Code:
+    """
+    Compiles a program. The program is compiled as a whole, before any of it
+    runs, so that statements executed repeatedly, such as the body of a while
+    loop, are only compiled once.
+    """
+    c = _Compiler()
+    for decl in p.decls:
+        c.declaration(decl)
+    return c.finish()
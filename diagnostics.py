@@ -1,13 +1,13 @@
 from dataclasses import dataclass
 
 
-@dataclass
+@dataclass(slots=True)
 class Pos:
     line_no: int
     col_no: int
 
 
-@dataclass
+@dataclass(slots=True)
 class Diagnostics:
     """
     Represents the information to diagnose problems related to a specific read
@@ -20,11 +20,12 @@ class Diagnostics:
     line: str
 
     def diagnostic_string(self) -> str:
-        if self.line is None:
-            raise RuntimeError("No diagnostics for uninitialized state.")
+        assert self.line is not None, "No diagnostics for uninitialized state."
 
-        line_prefix = f"{self.pos.line_no:>5}: "
-        output = [line_prefix + self.line]
+        # Trailing whitespace, including any newline, is only stripped here,
+        # so that reading input doesn't pay for it on lines without errors.
+        line_prefix = str(self.pos.line_no).rjust(5) + ": "
+        output = [line_prefix + self.line.rstrip()]
         arrow_indent = " " * len(line_prefix) + " " * (self.pos.col_no - 1)
         output.append(arrow_indent + "^")
         output.append(arrow_indent + "┗--- here")
@@ -1,5 +1,4 @@
 import sys
-from typing import Generator
 
 from expression_evaluator import TypeError, VariableError
 from interpreter import Interpreter
@@ -7,15 +6,16 @@ from parser import ParserError
 from token_generator import ScannerError
 
 
-def lazy_readlines(filename: str) -> Generator[str, None, None]:
+def read_source(filename: str) -> str:
+    # Source files are small enough to read in one call. The interpreter then
+    # scans the text directly instead of pulling it line by line.
     with open(filename, "r", encoding="utf-8") as f:
-        for line in f:
-            yield str(line)
+        return f.read()
 
 
 def scan_file(filename: str) -> None:
     try:
-        Interpreter().interpret(lazy_readlines(filename))
+        Interpreter().interpret(read_source(filename))
     except ScannerError as e:
         print(f"{e.message}:\n{e.diagnostics.diagnostic_string()}")
     except ParserError as e:
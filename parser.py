@@ -1,4 +1,5 @@
-from typing import List, Tuple
+from collections.abc import Callable
+from typing import Any, List, Tuple
 
 from buffered_scanner import BufferedScanner
 from diagnostics import Diagnostics
@@ -69,6 +70,7 @@ from tokens import (
     TRUE,
     VAR,
     WHILE,
+    Token,
 )
 
 
@@ -85,28 +87,33 @@ class ParserError(Exception):
         self.additional: List[Tuple[str, Diagnostics]] = additional
 
 
+# The tokens that make up a primary expression on their own, with a function
+# building the expression from the token and its diagnostics.
+_LITERALS: dict[type[Token], Callable[[Any, Diagnostics], Expression]] = {
+    NUMBER: lambda t, diag: Number(t.value, diag=diag),
+    STRING: lambda t, diag: String(t.value, diag=diag),
+    TRUE: lambda t, diag: TrueExpr(diag=diag),
+    FALSE: lambda t, diag: FalseExpr(diag=diag),
+    NIL: lambda t, diag: Nil(diag=diag),
+    IDENT: lambda t, diag: Variable(t.name, diag=diag),
+}
+
+
 def _parse_primary(tokens: BufferedScanner) -> Expression:
     diag = tokens.diagnostics()
     if not tokens.has_next():
         raise ParserError("Unexpected end of expression", diag)
     t = tokens.next()
+    # A dict lookup on the token's type, instead of trying each case of a
+    # match statement in turn.
+    literal = _LITERALS.get(type(t))
+    if literal is not None:
+        return literal(t, diag)
     match t:
-        case NUMBER(value):
-            return Number(value, diag=diag)
-        case STRING(value):
-            return String(value, diag=diag)
-        case TRUE():
-            return TrueExpr(diag=diag)
-        case FALSE():
-            return FalseExpr(diag=diag)
-        case NIL():
-            return Nil(diag=diag)
-        case IDENT(name):
-            return Variable(name, diag=diag)
         case LPAREN():
             start_paren_diag = diag
             expr = Grouping(parse_expression(tokens), diag=diag)
-            if not tokens.eat(RPAREN()):
+            if not tokens.eat_type(RPAREN):
                 raise ParserError(
                     "Missing closing parenthesis",
                     tokens.diagnostics(),
@@ -120,113 +127,66 @@ def _parse_primary(tokens: BufferedScanner) -> Expression:
 
 
 def _parse_unary(tokens: BufferedScanner) -> Expression:
-    diag = tokens.diagnostics()
-    if tokens.eat(BANG()):
-        expr = LogicalNot(_parse_unary(tokens), diag=diag)
-    elif tokens.eat(MINUS()):
-        expr = Negative(_parse_unary(tokens), diag=diag)
-    else:
-        expr = _parse_primary(tokens)
+    # The diagnostics are only fetched for an operator. An operand without
+    # one gets them in _parse_primary().
+    t = type(tokens.peek())
+    if t is not BANG and t is not MINUS:
+        return _parse_primary(tokens)
 
-    return expr
-
-
-def _parse_factor(tokens: BufferedScanner) -> Expression:
+    diag = tokens.diagnostics()
+    tokens.next()
+    if t is BANG:
+        return LogicalNot(_parse_unary(tokens), diag=diag)
+    return Negative(_parse_unary(tokens), diag=diag)
+
+
+# The binary operators, with their precedence and the node they produce. A
+# higher precedence binds tighter. All of them are left-associative.
+_BINARY_OPERATORS: dict[type[Token], tuple[int, Callable[..., Expression]]] = {
+    OR: (1, LogicalOr),
+    AND: (2, LogicalAnd),
+    EQUAL_EQUAL: (3, EqualEqualExpr),
+    BANG_EQUAL: (3, NotEqualExpr),
+    LESS: (4, LessThanExpr),
+    LESS_EQUAL: (4, LessEqualExpr),
+    GREATER: (4, GreaterThanExpr),
+    GREATER_EQUAL: (4, GreaterEqualExpr),
+    PLUS: (5, Add),
+    MINUS: (5, Subtract),
+    STAR: (6, Mult),
+    SLASH: (6, Div),
+}
+
+
+def _parse_binary(tokens: BufferedScanner, min_precedence: int = 1) -> Expression:
+    """
+    Parses operands joined by binary operators of at least min_precedence,
+    by precedence climbing. Operators that bind tighter are parsed by the
+    recursive call for the right operand, so a single function handles all
+    precedence levels.
+    """
     expr = _parse_unary(tokens)
     while tokens.has_next():
-        diag = tokens.diagnostics()
-        if tokens.eat(STAR()):
-            expr = Mult(expr, _parse_unary(tokens), diag=diag)
-        elif tokens.eat(SLASH()):
-            expr = Div(expr, _parse_unary(tokens), diag=diag)
-        else:
-            break
-
-    return expr
-
-
-def _parse_term(tokens: BufferedScanner) -> Expression:
-    expr = _parse_factor(tokens)
-    while tokens.has_next():
-        diag = tokens.diagnostics()
-        if tokens.eat(PLUS()):
-            expr = Add(expr, _parse_factor(tokens), diag=diag)
-        elif tokens.eat(MINUS()):
-            expr = Subtract(expr, _parse_factor(tokens), diag=diag)
-        else:
-            break
-
-    return expr
-
-
-def _parse_comparison(tokens: BufferedScanner) -> Expression:
-    expr = _parse_term(tokens)
-    while tokens.has_next():
-        diag = tokens.diagnostics()
-        if tokens.eat(LESS()):
-            expr = LessThanExpr(expr, _parse_term(tokens), diag=diag)
-        elif tokens.eat(LESS_EQUAL()):
-            expr = LessEqualExpr(expr, _parse_term(tokens), diag=diag)
-        elif tokens.eat(GREATER()):
-            expr = GreaterThanExpr(expr, _parse_term(tokens), diag=diag)
-        elif tokens.eat(GREATER_EQUAL()):
-            expr = GreaterEqualExpr(expr, _parse_term(tokens), diag=diag)
-        else:
-            break
-
-    return expr
-
-
-def _parse_equality(tokens: BufferedScanner) -> Expression:
-    expr = _parse_comparison(tokens)
-    while tokens.has_next():
-        diag = tokens.diagnostics()
-        if tokens.eat(EQUAL_EQUAL()):
-            expr = EqualEqualExpr(expr, _parse_comparison(tokens), diag=diag)
-        elif tokens.eat(BANG_EQUAL()):
-            expr = NotEqualExpr(expr, _parse_comparison(tokens), diag=diag)
-        else:
+        operator = _BINARY_OPERATORS.get(type(tokens.peek()))
+        if operator is None or operator[0] < min_precedence:
             break
-
-    return expr
-
-
-def _parse_logical_and(tokens: BufferedScanner) -> Expression:
-    expr = _parse_equality(tokens)
-    while tokens.has_next():
+        precedence, node = operator
         diag = tokens.diagnostics()
-        if tokens.eat(AND()):
-            expr = LogicalAnd(expr, _parse_equality(tokens), diag=diag)
-        else:
-            break
-
-    return expr
-
-
-def _parse_logical_or(tokens: BufferedScanner) -> Expression:
-    expr = _parse_logical_and(tokens)
-    while tokens.has_next():
-        diag = tokens.diagnostics()
-        if tokens.eat(OR()):
-            expr = LogicalOr(expr, _parse_logical_and(tokens), diag=diag)
-        else:
-            break
+        tokens.next()
+        expr = node(expr, _parse_binary(tokens, precedence + 1), diag=diag)
 
     return expr
 
 
 def _parse_assign_or_equality(tokens: BufferedScanner) -> Expression:
-    # Parse first IDENT as an expression.
-    diag = tokens.diagnostics()
-
     # This is the place where we can't do one-token-lookahead parsing. This will be even
     # more true once lvalues become more complex things than just a single identifier.
     # We try to parse the tokens as an equality. If that's equal to a simple identifier
     # node followed by an equal sign, we convert the parsed equality node (which is
     # a variable node) to an assignment node.
-    ident_or_equality = _parse_logical_or(tokens)
+    ident_or_equality = _parse_binary(tokens)
     diag = tokens.diagnostics()
-    if tokens.eat(EQUAL()):
+    if tokens.eat_type(EQUAL):
         if not isinstance(ident_or_equality, Variable):
             raise ParserError("Invalid lvalue", diag)
         return Assignment(
@@ -242,18 +202,18 @@ def parse_expression(tokens: BufferedScanner) -> Expression:
 
 def _parse_print_stmt(tokens: BufferedScanner) -> PrintStmt:
     diag = tokens.diagnostics()
-    tokens.eat(PRINT())
+    tokens.eat_type(PRINT)
     lparen_diag = tokens.diagnostics()
-    if not tokens.eat(LPAREN()):
+    if not tokens.eat_type(LPAREN):
         raise ParserError("Unexpected token, expected '('", tokens.diagnostics())
     stmt = PrintStmt(parse_expression(tokens), diag=diag)
-    if not tokens.eat(RPAREN()):
+    if not tokens.eat_type(RPAREN):
         raise ParserError(
             "Missing closing parenthesis in print statement",
             tokens.diagnostics(),
             [("Opening parenthesis here", lparen_diag)],
         )
-    if not tokens.eat(SEMICOLON()):
+    if not tokens.eat_type(SEMICOLON):
         raise ParserError(
             "Missing semicolon after print statement", tokens.diagnostics()
         )
@@ -263,7 +223,7 @@ def _parse_print_stmt(tokens: BufferedScanner) -> PrintStmt:
 
 def _parse_var_decl(tokens: BufferedScanner) -> VarDecl:
     diag = tokens.diagnostics()
-    tokens.eat(VAR())
+    tokens.eat_type(VAR)
     match tokens.peek():
         case IDENT(s):
             tokens.next()
@@ -271,11 +231,11 @@ def _parse_var_decl(tokens: BufferedScanner) -> VarDecl:
         case _:
             raise ParserError("Unexpected token", tokens.diagnostics())
 
-    if tokens.eat(EQUAL()):
+    if tokens.eat_type(EQUAL):
         decl = VarDecl(name, parse_expression(tokens), diag=diag)
     else:
         decl = VarDecl(name, None, diag=diag)
-    if not tokens.eat(SEMICOLON()):
+    if not tokens.eat_type(SEMICOLON):
         raise ParserError(
             "Missing semicolon after variable declaration", tokens.diagnostics()
         )
@@ -285,12 +245,12 @@ def _parse_var_decl(tokens: BufferedScanner) -> VarDecl:
 
 def _parse_if_statement(tokens: BufferedScanner) -> IfStmt:
     diag = tokens.diagnostics()
-    tokens.eat(IF())
+    tokens.eat_type(IF)
     lparen_diag = tokens.diagnostics()
-    if not tokens.eat(LPAREN()):
+    if not tokens.eat_type(LPAREN):
         raise ParserError("Expected '(' after 'if'", tokens.diagnostics())
     condition = parse_expression(tokens)
-    if not tokens.eat(RPAREN()):
+    if not tokens.eat_type(RPAREN):
         raise ParserError(
             "Expected ')' after if condition",
             tokens.diagnostics(),
@@ -299,7 +259,7 @@ def _parse_if_statement(tokens: BufferedScanner) -> IfStmt:
 
     then_branch = parse_statement(tokens)
     else_branch = None
-    if tokens.eat(ELSE()):
+    if tokens.eat_type(ELSE):
         else_branch = parse_statement(tokens)
 
     return IfStmt(condition, then_branch, else_branch, diag=diag)
@@ -307,12 +267,12 @@ def _parse_if_statement(tokens: BufferedScanner) -> IfStmt:
 
 def _parse_while_statement(tokens: BufferedScanner) -> WhileStmt:
     diag = tokens.diagnostics()
-    tokens.eat(WHILE())
+    tokens.eat_type(WHILE)
     lparen_diag = tokens.diagnostics()
-    if not tokens.eat(LPAREN()):
+    if not tokens.eat_type(LPAREN):
         raise ParserError("Expected '(' after 'while'", tokens.diagnostics())
     condition = parse_expression(tokens)
-    if not tokens.eat(RPAREN()):
+    if not tokens.eat_type(RPAREN):
         raise ParserError(
             "Expected ')' after while condition",
             tokens.diagnostics(),
@@ -324,40 +284,40 @@ def _parse_while_statement(tokens: BufferedScanner) -> WhileStmt:
 
 def _parse_for_statement(tokens: BufferedScanner) -> Statement:
     diag = tokens.diagnostics()
-    tokens.eat(FOR())
+    tokens.eat_type(FOR)
     lparen_diag = tokens.diagnostics()
-    if not tokens.eat(LPAREN()):
+    if not tokens.eat_type(LPAREN):
         raise ParserError("Expected '(' after 'for'", tokens.diagnostics())
 
     # Initializer
     init: VarDecl | ExprStmt | None = None
-    if tokens.peek() == VAR():
+    if type(tokens.peek()) is VAR:
         init = _parse_var_decl(tokens)
-    elif tokens.peek() != SEMICOLON():
+    elif type(tokens.peek()) is not SEMICOLON:
         init = ExprStmt(parse_expression(tokens), diag=diag)
         # An expr statement is an expression plus semicolon, so we still need to eat that.
-        if not tokens.eat(SEMICOLON()):
+        if not tokens.eat_type(SEMICOLON):
             raise ParserError(
                 "Expected ';' after for initializer", tokens.diagnostics()
             )
     else:
-        tokens.eat(SEMICOLON())
+        tokens.eat_type(SEMICOLON)
 
     # Condition
     cond: Expression | None = None
-    if not tokens.eat(SEMICOLON()):
+    if not tokens.eat_type(SEMICOLON):
         cond = parse_expression(tokens)
-        if not tokens.eat(SEMICOLON()):
+        if not tokens.eat_type(SEMICOLON):
             raise ParserError(
                 "Expected ';' after for loop condition", tokens.diagnostics()
             )
 
     # Post-loop expression
     post = None
-    if not tokens.peek() == RPAREN():
+    if type(tokens.peek()) is not RPAREN:
         post = parse_expression(tokens)
 
-    if not tokens.eat(RPAREN()):
+    if not tokens.eat_type(RPAREN):
         raise ParserError(
             "Missing ')' in for statement header",
             tokens.diagnostics(),
@@ -399,52 +359,51 @@ def _parse_for_statement(tokens: BufferedScanner) -> Statement:
 
 
 def parse_statement(tokens) -> Statement:
-    diag = tokens.diagnostics()
-    match tokens.peek():
-        case PRINT():
-            stmt = _parse_print_stmt(tokens)
-        case LBRACE():
-            stmt = _parse_block_stmt(tokens)
-        case IF():
-            stmt = _parse_if_statement(tokens)
-        case WHILE():
-            stmt = _parse_while_statement(tokens)
-        case FOR():
-            stmt = _parse_for_statement(tokens)
-        case _:
-            # ExprStmt parsed here, contains a semicolon.
-            # The Expression doesnt.
-            stmt = ExprStmt(parse_expression(tokens), diag=diag)
-            if not tokens.eat(SEMICOLON()):
-                raise ParserError(
-                    "Missing semicolon after expression statement", tokens.diagnostics()
-                )
+    # The token types are compared by identity, which is cheaper than
+    # matching class patterns.
+    t = type(tokens.peek())
+    if t is PRINT:
+        stmt = _parse_print_stmt(tokens)
+    elif t is LBRACE:
+        stmt = _parse_block_stmt(tokens)
+    elif t is IF:
+        stmt = _parse_if_statement(tokens)
+    elif t is WHILE:
+        stmt = _parse_while_statement(tokens)
+    elif t is FOR:
+        stmt = _parse_for_statement(tokens)
+    else:
+        # ExprStmt parsed here, contains a semicolon.
+        # The Expression doesnt.
+        diag = tokens.diagnostics()
+        stmt = ExprStmt(parse_expression(tokens), diag=diag)
+        if not tokens.eat_type(SEMICOLON):
+            raise ParserError(
+                "Missing semicolon after expression statement", tokens.diagnostics()
+            )
 
     return stmt
 
 
 def _parse_declaration(tokens: BufferedScanner) -> Declaration:
-    match tokens.peek():
-        case VAR():
-            stmt = _parse_var_decl(tokens)
-        case _:
-            stmt = parse_statement(tokens)
-    return stmt
+    if type(tokens.peek()) is VAR:
+        return _parse_var_decl(tokens)
+    return parse_statement(tokens)
 
 
 def parse_program(tokens: BufferedScanner) -> Program:
     # Currently only a single expression is supported.
-    if tokens.eat(EOF()):
+    if tokens.eat_type(EOF):
         # No expression (empty program)
         return Program([])
 
     declarations = []
-    while tokens.has_next() and tokens.peek() != EOF():
+    while tokens.has_next() and type(tokens.peek()) is not EOF:
         declarations.append(_parse_declaration(tokens))
 
     if not tokens.has_next():
         raise ParserError("Unexpected end of input, expected EOF", tokens.diagnostics())
-    if not tokens.eat(EOF()):
+    if not tokens.eat_type(EOF):
         raise ParserError(
             "Unexpected token; expected end-of-file", tokens.diagnostics()
         )
@@ -452,13 +411,12 @@ def parse_program(tokens: BufferedScanner) -> Program:
 
 
 def _parse_block_stmt(tokens: BufferedScanner) -> BlockStmt:
-    diag = tokens.diagnostics()
-    lbrace_diag = tokens.diagnostics()
-    tokens.eat(LBRACE())
+    diag = lbrace_diag = tokens.diagnostics()
+    tokens.eat_type(LBRACE)
 
     declarations = []
-    while tokens.has_next() and tokens.peek() != RBRACE():
-        if tokens.peek() == EOF():
+    while tokens.has_next() and type(tokens.peek()) is not RBRACE:
+        if type(tokens.peek()) is EOF:
             raise ParserError(
                 "Expected '}' after block",
                 tokens.diagnostics(),
@@ -473,7 +431,7 @@ def _parse_block_stmt(tokens: BufferedScanner) -> BlockStmt:
             [("Opening brace here", lbrace_diag)],
         )
 
-    if not tokens.eat(RBRACE()):
+    if not tokens.eat_type(RBRACE):
         raise ParserError(
             "Expected '}' after block",
             tokens.diagnostics(),
@@ -1,5 +1,5 @@
 from dataclasses import dataclass, field
-from typing import List
+from typing import ClassVar, List
 
 from diagnostics import Diagnostics
 
@@ -48,181 +48,199 @@ from diagnostics import Diagnostics
 #                  | "(" Expression ")"
 
 
-@dataclass
+@dataclass(slots=True)
 class Declaration:
     diag: Diagnostics = field(kw_only=True)
 
 
-@dataclass
+@dataclass(slots=True, weakref_slot=True)
 class Program:
     decls: List[Declaration]
 
 
 class Statement(Declaration):
-    pass
+    __slots__ = ()
 
 
-@dataclass
+@dataclass(slots=True)
 class Expression:
     diag: Diagnostics = field(kw_only=True)
 
 
 class LiteralExpression(Expression):
-    pass
+    __slots__ = ()
 
 
-@dataclass
+@dataclass(slots=True)
 class Number(LiteralExpression):
     value: float
+    # The printed representation of value. Computed once at construction, so
+    # that printing the node doesn't format the float again on every visit.
+    text: str = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        self.text = str(self.value)
 
 
-@dataclass
+@dataclass(slots=True)
 class String(LiteralExpression):
     value: str
 
 
-@dataclass
+@dataclass(slots=True)
 class TrueExpr(LiteralExpression):
     pass
 
 
-@dataclass
+@dataclass(slots=True)
 class FalseExpr(LiteralExpression):
     pass
 
 
-@dataclass
+@dataclass(slots=True)
 class Nil(LiteralExpression):
     pass
 
 
-@dataclass
+@dataclass(slots=True)
 class Variable(LiteralExpression):
     name: str
 
 
-@dataclass
+@dataclass(slots=True)
 class Grouping(Expression):
     expr: Expression
 
 
-@dataclass
+@dataclass(slots=True)
 class Negative(Expression):
     expr: Expression
 
 
-@dataclass
+@dataclass(slots=True)
 class LogicalNot(Expression):
     expr: Expression
 
 
-@dataclass
+@dataclass(slots=True)
 class EqualEqualExpr(Expression):
+    OP: ClassVar[str] = "=="
     lhs: Expression
     rhs: Expression
 
 
-@dataclass
+@dataclass(slots=True)
 class NotEqualExpr(Expression):
+    OP: ClassVar[str] = "!="
     lhs: Expression
     rhs: Expression
 
 
-@dataclass
+@dataclass(slots=True)
 class LessThanExpr(Expression):
+    OP: ClassVar[str] = "<"
     lhs: Expression
     rhs: Expression
 
 
-@dataclass
+@dataclass(slots=True)
 class LessEqualExpr(Expression):
+    OP: ClassVar[str] = "<="
     lhs: Expression
     rhs: Expression
 
 
-@dataclass
+@dataclass(slots=True)
 class GreaterThanExpr(Expression):
+    OP: ClassVar[str] = ">"
     lhs: Expression
     rhs: Expression
 
 
-@dataclass
+@dataclass(slots=True)
 class GreaterEqualExpr(Expression):
+    OP: ClassVar[str] = ">="
     lhs: Expression
     rhs: Expression
 
 
-@dataclass
+@dataclass(slots=True)
 class Add(Expression):
+    OP: ClassVar[str] = "+"
     lhs: Expression
     rhs: Expression
 
 
-@dataclass
+@dataclass(slots=True)
 class Subtract(Expression):
+    OP: ClassVar[str] = "-"
     lhs: Expression
     rhs: Expression
 
 
-@dataclass
+@dataclass(slots=True)
 class Mult(Expression):
+    OP: ClassVar[str] = "*"
     lhs: Expression
     rhs: Expression
 
 
-@dataclass
+@dataclass(slots=True)
 class Div(Expression):
+    OP: ClassVar[str] = "/"
     lhs: Expression
     rhs: Expression
 
 
-@dataclass
+@dataclass(slots=True)
 class LogicalAnd(Expression):
+    OP: ClassVar[str] = "and"
     lhs: Expression
     rhs: Expression
 
 
-@dataclass
+@dataclass(slots=True)
 class LogicalOr(Expression):
+    OP: ClassVar[str] = "or"
     lhs: Expression
     rhs: Expression
 
 
-@dataclass
+@dataclass(slots=True)
 class PrintStmt(Statement):
     expr: Expression
 
 
-@dataclass
+@dataclass(slots=True)
 class ExprStmt(Statement):
     expr: Expression
 
 
-@dataclass
+@dataclass(slots=True)
 class VarDecl(Declaration):
     name: str
     expr: Expression | None
 
 
-@dataclass
+@dataclass(slots=True)
 class Assignment(Expression):
     target: str
     expr: Expression
 
 
-@dataclass
+@dataclass(slots=True)
 class BlockStmt(Statement):
     declarations: List[Declaration]
 
 
-@dataclass
+@dataclass(slots=True)
 class IfStmt(Statement):
     condition: Expression
     then_branch: Statement
     else_branch: Statement | None
 
 
-@dataclass
+@dataclass(slots=True)
 class WhileStmt(Statement):
     condition: Expression
     body: Statement
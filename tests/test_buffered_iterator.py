@@ -1,5 +1,5 @@
 import unittest
-from buffered_iterator import BufferedIterator
+from buffered_iterator import BufferedIterator, SingleBufferedIterator
 
 
 class TestBufferedIterator(unittest.TestCase):
@@ -62,8 +62,10 @@ class TestBufferedIterator(unittest.TestCase):
 
         with self.assertRaises(StopIteration):
             b.peek(1)
+        self.assertEqual(b.peek_or(None), 3)
 
         self.assertTrue(b.eat(3))
+        self.assertIsNone(b.peek_or(None))
 
         self.assertFalse(b.eat(4))
 
@@ -84,3 +86,55 @@ class TestBufferedIterator(unittest.TestCase):
         with self.assertRaises(Exception) as context:
             b.next()
         self.assertEqual(str(context.exception), "foo")
+
+
+class TestSingleBufferedIterator(unittest.TestCase):
+    def test_empty_iterator(self):
+        b = SingleBufferedIterator(iter([]))
+        self.assertFalse(b.has_next())
+        self.assertFalse(b.can_peek())
+        self.assertFalse(b.eat(1))
+        with self.assertRaises(StopIteration):
+            b.peek()
+        with self.assertRaises(StopIteration):
+            b.next()
+
+    def test_index_greater_than_bufsize(self):
+        b = SingleBufferedIterator(iter([1]))
+        with self.assertRaises(ValueError):
+            b.can_peek(1)
+        with self.assertRaises(ValueError):
+            b.peek(1)
+        with self.assertRaises(ValueError):
+            b.peek(-1)
+
+    def test_advance_peek_and_eat(self):
+        b = SingleBufferedIterator(iter([1, 2, 3]))
+        self.assertEqual(b.peek(), 1)
+        self.assertEqual(b.next(), 1)
+        self.assertFalse(b.eat(3))
+        self.assertTrue(b.eat(2))
+        self.assertTrue(b.has_next())
+        self.assertEqual(b.peek_or(None), 3)
+        self.assertEqual(b.next(), 3)
+        self.assertFalse(b.has_next())
+        self.assertIsNone(b.peek_or(None))
+
+    def test_raises_exception_at_right_point(self):
+        def exception_generator():
+            yield 1
+            raise Exception("foo")
+
+        b = SingleBufferedIterator(exception_generator())
+
+        self.assertEqual(b.next(), 1)
+
+        self.assertTrue(b.can_peek(0))
+        with self.assertRaises(Exception) as context:
+            b.peek()
+        self.assertEqual(str(context.exception), "foo")
+
+        with self.assertRaises(Exception) as context:
+            b.next()
+        self.assertEqual(str(context.exception), "foo")
+        self.assertFalse(b.has_next())
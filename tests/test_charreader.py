@@ -1,3 +1,4 @@
+import re
 import unittest
 from charreader import CharReader
 from diagnostics import Pos
@@ -211,3 +212,26 @@ class TestCharReader(unittest.TestCase):
         self.assertTrue(c.eat("d"))
         self.assertTrue(c.eat("f"))
         self.assertFalse(c.eat("x"))
+
+    def test_read_run(self):
+        c = CharReader(iter(["ab12 ", "c"]))
+        self.assertEqual(c.read_run(re.compile(r"\d+")), "")
+        self.assertEqual(c.read_run(re.compile(r"[a-z]+")), "ab")
+        self.assertEqual(c.read_run(re.compile(r"\w+")), "12")
+        self.assertEqual(c.read_run(re.compile(r"\s+")), " ")
+        self.assertEqual(c.diagnostics().pos, Pos(2, 1))
+        self.assertEqual(c.read_run(re.compile(r"\w+")), "c")
+        self.assertFalse(c.has_next())
+
+    def test_from_string(self):
+        c = CharReader.from_string("ab\n\n  cd  \n")
+        self.assertEqual(c.read_run(re.compile(r"ab\s*")), "ab\n\n  ")
+        self.assertEqual(c.diagnostics().pos, Pos(3, 3))
+        self.assertEqual(c.diagnostics().line, "  cd  ")
+        self.assertEqual(c.read_run(re.compile(r".*", re.DOTALL)), "cd  \n")
+        self.assertEqual(c.diagnostics().pos, Pos(3, 8))
+
+    def test_from_empty_string(self):
+        c = CharReader.from_string("")
+        self.assertFalse(c.has_next())
+        self.assertEqual(c.diagnostics().pos, Pos(0, 0))
@@ -11,3 +11,9 @@ class DiagnosticsTest(unittest.TestCase):
          ^
          ┗--- here""",
         )
+
+    def test_trailing_whitespace_is_not_printed(self):
+        self.assertEqual(
+            Diagnostics(Pos(1, 1), "x  \n").diagnostic_string(),
+            "    1: x\n       ^\n       ┗--- here",
+        )
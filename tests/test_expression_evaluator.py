@@ -183,6 +183,22 @@ class ExpressionEvaluatorTest(unittest.TestCase):
             self._evaluate("1 + ((true != false) == !false)")
         self.assertEqual(ctx.exception.diagnostics.pos, Pos(1, 3))
 
+    def test_operators_with_constant_right_operand(self):
+        vars = {"a": 6.0, "b": True}
+        self.assertEvaluates("a + 2", 8.0, vars)
+        self.assertEvaluates("a / 2 < 4", True, vars)
+        self.assertEvaluates("a + (b and 2)", 8.0, vars)
+        with self.assertRaises(TypeError):
+            self._evaluate("a + (!b and 2)", vars)
+
+        with self.assertRaises(TypeError) as ctx:
+            self._evaluate("b - 2", vars)
+        self.assertEqual(ctx.exception.diagnostics.pos, Pos(1, 1))
+
+        with self.assertRaises(TypeError) as ctx:
+            self._evaluate("b + 2", vars)
+        self.assertEqual(ctx.exception.diagnostics.pos, Pos(1, 3))
+
     def test_complex_expressions(self):
         self.assertEvaluates("4 + 7*8/ 93 > 4.60", True)
         self.assertEvaluates("4 + 7*8/ 93 < 4.61", True)
@@ -190,6 +206,12 @@ class ExpressionEvaluatorTest(unittest.TestCase):
         self.assertEvaluates("(!true == true) == (!false == false)", True)
         self.assertEvaluates("(!true == false) == (!false == false)", False)
 
+    def test_logical_operators_short_circuit(self):
+        # The right operand is not evaluated, so the undefined variable is
+        # never looked up.
+        self.assertEvaluates("false and x", False)
+        self.assertEvaluates("true or x", True)
+
     # Assignment expressions
 
     def test_simple_assignment(self):
@@ -217,6 +217,12 @@ class TestInterpreter(unittest.TestCase):
         with self.assertOutputs("17.0"):
             Interpreter().interpret("print(3 + 2 * (10 - 4) / 2 + 8);")
 
+    def test_deeply_nested_expression(self):
+        with self.assertOutputs("5000.0"):
+            Interpreter().interpret(
+                ["var a = 1;", "print(" + " + ".join(["a"] * 5000) + ");"]
+            )
+
     def test_string_concatenation(self):
         with self.assertOutputs("HelloWorld"):
             Interpreter().interpret('print("Hello" + "World");')
@@ -257,6 +263,23 @@ class TestInterpreter(unittest.TestCase):
                 ]
             )
 
+    def test_initializer_sees_outer_variable(self):
+        with self.assertOutputs("2.0\n1.0"):
+            Interpreter().interpret(
+                ["var a = 1;", "{", "  var a = a + 1;", "  print(a);", "}", "print(a);"]
+            )
+
+    def test_sibling_blocks_do_not_share_variables(self):
+        with self.assertOutputs("1.0\n2.0\nouter"):
+            Interpreter().interpret(
+                [
+                    'var b = "outer";',
+                    "{ var a = 1; print(a); }",
+                    "{ var b = 2; print(b); }",
+                    "print(b);",
+                ]
+            )
+
     def test_complex_if_else_if_ladder(self):
         with self.assertOutputs("second"):
             Interpreter().interpret(
@@ -295,10 +318,77 @@ class TestInterpreter(unittest.TestCase):
         with self.assertRaises(TypeError):
             Interpreter().interpret("print(10 / 0);")
 
+    def test_failing_constant_expression_not_executed(self):
+        with self.assertOutputs("ok"):
+            Interpreter().interpret('if (false) print(1 / 0); print("ok");')
+
+    def test_long_failing_constant_expression_not_executed(self):
+        with self.assertOutputs("ok"):
+            Interpreter().interpret(
+                "var x = 1; if (x == 2) print(nil" + " - 1" * 2000 + '); print("ok");'
+            )
+
+    def test_constant_left_operand_skips_failing_right_operand(self):
+        with self.assertOutputs("False\nTrue"):
+            Interpreter().interpret(
+                ["print(false and (nil - 1));", "print(1 < 2 or -nil);"]
+            )
+
+    def test_equality_of_computed_values(self):
+        with self.assertOutputs("True\nFalse"):
+            Interpreter().interpret(
+                [
+                    "var a = 1;",
+                    "print((a - 1) == (a * 0));",
+                    "print((a < 2) != (a > 0));",
+                ]
+            )
+
+    def test_equality_of_computed_values_of_different_types(self):
+        with self.assertRaises(TypeError):
+            Interpreter().interpret(["var a = 1;", 'print((a - 1) == "0");'])
+
+    def test_logical_operators_with_constant_left_operand(self):
+        with self.assertOutputs("False\n1.0\nTrue\n1.0"):
+            Interpreter().interpret(
+                [
+                    "var a = 1;",
+                    "print(false and a);",
+                    "print(true and a);",
+                    "print(1 < 2 or a);",
+                    "print(nil or a);",
+                ]
+            )
+
     def test_unary_negation_on_non_number(self):
         with self.assertRaises(TypeError):
             Interpreter().interpret('print(-"hello");')
 
+    def test_left_operand_checked_before_right_operand_runs(self):
+        i = Interpreter()
+        i.interpret("var x = 1;")
+        with self.assertRaises(TypeError):
+            i.interpret('print("a" - (x = 5));')
+        with self.assertRaises(TypeError):
+            i.interpret("print(nil < (x = 9));")
+        with self.assertOutputs("1.0"):
+            i.interpret("print(x);")
+
+    def test_left_operand_error_reported_before_right_operand_error(self):
+        with self.assertRaises(TypeError) as context:
+            Interpreter().interpret('print("a" - y);')
+
+        self.assertEqual(context.exception.message, "Expected: number")
+
+    def test_assignment_target_checked_before_value_runs(self):
+        i = Interpreter()
+        i.interpret("var y = 1;")
+        with self.assertRaises(VariableError) as context:
+            i.interpret("undefined_v = (y = 7);")
+        self.assertIn("undefined_v not declared", context.exception.message)
+        with self.assertOutputs("1.0"):
+            i.interpret("print(y);")
+
     # While loops
 
     def test_while_loop(self):
@@ -306,3 +396,31 @@ class TestInterpreter(unittest.TestCase):
             Interpreter().interpret(
                 ["var a = 1;", "while (a <= 3) {", "  print(a);", "a = a + 1;}"]
             )
+
+    def test_while_loop_with_false_condition(self):
+        with self.assertOutputs("done"):
+            Interpreter().interpret('while (1 > 2) print("never"); print("done");')
+
+    def test_repeated_input(self):
+        i = Interpreter()
+        i.interpret("var a = 1;")
+        with self.assertOutputs("2.0\n3.0"):
+            i.interpret("a = a + 1; print(a);")
+            i.interpret("a = a + 1; print(a);")
+
+    def test_assignment_statements(self):
+        with self.assertOutputs("3.0\n2.0"):
+            Interpreter().interpret(
+                [
+                    "var a = 1;",
+                    "{ var b = 1; b = b + 1; a = a + b; print(a); print(b); }",
+                ]
+            )
+
+    def test_error_in_block_restores_global_scope(self):
+        i = Interpreter()
+        i.interpret("var a = 1;")
+        with self.assertRaises(TypeError):
+            i.interpret(["{", "  var a = 2;", "  print(a + true);", "}"])
+        with self.assertOutputs("1.0"):
+            i.interpret("print(a);")
@@ -1,6 +1,6 @@
 import unittest
 
-from ast_printer import print_program
+from ast_printer import compile_printer, print_program
 from buffered_iterator import BufferedIterator
 from buffered_scanner import BufferedScanner
 from charreader import CharReader
@@ -32,6 +32,13 @@ class TestParser(unittest.TestCase):
     def test_empty_program(self):
         self.assertParses("", "")
 
+    def test_compiled_printer(self):
+        p = parse_string("var a = 1;\nprint(a + 2);")
+        printer = compile_printer(p)
+        self.assertEqual(printer(), print_program(p))
+        self.assertEqual(printer(), "( var a 1.0 )\n( print ( + a 2.0 ) )")
+        self.assertIs(compile_printer(p), printer)
+
     # Expressions
 
     def test_true_literal(self):
@@ -109,6 +116,13 @@ class TestParser(unittest.TestCase):
         self.assertParses("!!true;", "( ! ( ! true ) )")
         self.assertParses("--2;", "( - ( - 2.0 ) )")
 
+    def test_long_operator_chain(self):
+        # Printing must not be limited by the recursion depth.
+        n = 5000
+        self.assertParses(
+            " + ".join(["1"] * n) + ";", "( + " * (n - 1) + "1.0" + " 1.0 )" * (n - 1)
+        )
+
     # Statements
 
     def test_print_stmt(self):
@@ -173,6 +173,9 @@ class TokenGeneratorTest(unittest.TestCase):
             EOF(),
         )
 
+    def test_comments_separated_by_whitespace(self):
+        self.assertTokens("// one\n  // two\n\t;", SEMICOLON(), EOF())
+
     def test_scan_tokens_whitespace(self):
         self.assertTokens(
             '   \t  \n \n (     var ("hund")  \t\n\n\t )   ',
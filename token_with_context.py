@@ -1,9 +1,14 @@
-from dataclasses import dataclass
+from typing import NamedTuple
 from tokens import Token
 from charreader import Diagnostics
 
 
-@dataclass
-class TokenWithContext:
+class TokenWithContext(NamedTuple):
+    """
+    A token and the diagnostics for where it was found. This is a tuple so
+    that the scanner can unpack it by index on its hot path, while other code
+    can still use the field names.
+    """
+
     t: Token
     d: Diagnostics
@@ -1,57 +1,57 @@
 from dataclasses import dataclass
 
 
-@dataclass
+@dataclass(slots=True)
 class Token:
     pass
 
 
-@dataclass
+@dataclass(slots=True)
 class LPAREN(Token):
     pass
 
 
-@dataclass
+@dataclass(slots=True)
 class RPAREN(Token):
     pass
 
 
-@dataclass
+@dataclass(slots=True)
 class LBRACE(Token):
     pass
 
 
-@dataclass
+@dataclass(slots=True)
 class RBRACE(Token):
     pass
 
 
-@dataclass
+@dataclass(slots=True)
 class COMMA(Token):
     pass
 
 
-@dataclass
+@dataclass(slots=True)
 class DOT(Token):
     pass
 
 
-@dataclass
+@dataclass(slots=True)
 class MINUS(Token):
     pass
 
 
-@dataclass
+@dataclass(slots=True)
 class PLUS(Token):
     pass
 
 
-@dataclass
+@dataclass(slots=True)
 class SEMICOLON(Token):
     pass
 
 
-@dataclass
+@dataclass(slots=True)
 class SLASH(Token):
     pass
 
@@ -59,42 +59,42 @@ class SLASH(Token):
 # One or two character tokens
 
 
-@dataclass
+@dataclass(slots=True)
 class BANG(Token):
     pass
 
 
-@dataclass
+@dataclass(slots=True)
 class BANG_EQUAL(Token):
     pass
 
 
-@dataclass
+@dataclass(slots=True)
 class EQUAL(Token):
     pass
 
 
-@dataclass
+@dataclass(slots=True)
 class EQUAL_EQUAL(Token):
     pass
 
 
-@dataclass
+@dataclass(slots=True)
 class GREATER(Token):
     pass
 
 
-@dataclass
+@dataclass(slots=True)
 class GREATER_EQUAL(Token):
     pass
 
 
-@dataclass
+@dataclass(slots=True)
 class LESS(Token):
     pass
 
 
-@dataclass
+@dataclass(slots=True)
 class LESS_EQUAL(Token):
     pass
 
@@ -102,17 +102,17 @@ class LESS_EQUAL(Token):
 # Literals
 
 
-@dataclass
+@dataclass(slots=True)
 class IDENT(Token):
     name: str
 
 
-@dataclass
+@dataclass(slots=True)
 class STRING(Token):
     value: str
 
 
-@dataclass
+@dataclass(slots=True)
 class NUMBER(Token):
     value: float
 
@@ -120,91 +120,91 @@ class NUMBER(Token):
 # Keywords
 
 
-@dataclass
+@dataclass(slots=True)
 class AND(Token):
     pass
 
 
-@dataclass
+@dataclass(slots=True)
 class CLASS(Token):
     pass
 
 
-@dataclass
+@dataclass(slots=True)
 class ELSE(Token):
     pass
 
 
-@dataclass
+@dataclass(slots=True)
 class FALSE(Token):
     pass
 
 
-@dataclass
+@dataclass(slots=True)
 class FUN(Token):
     pass
 
 
-@dataclass
+@dataclass(slots=True)
 class FOR(Token):
     pass
 
 
-@dataclass
+@dataclass(slots=True)
 class IF(Token):
     pass
 
 
-@dataclass
+@dataclass(slots=True)
 class NIL(Token):
     pass
 
 
-@dataclass
+@dataclass(slots=True)
 class OR(Token):
     pass
 
 
-@dataclass
+@dataclass(slots=True)
 class PRINT(Token):
     pass
 
 
-@dataclass
+@dataclass(slots=True)
 class RETURN(Token):
     pass
 
 
-@dataclass
+@dataclass(slots=True)
 class STAR(Token):
     pass
 
 
-@dataclass
+@dataclass(slots=True)
 class SUPER(Token):
     pass
 
 
-@dataclass
+@dataclass(slots=True)
 class THIS(Token):
     pass
 
 
-@dataclass
+@dataclass(slots=True)
 class TRUE(Token):
     pass
 
 
-@dataclass
+@dataclass(slots=True)
 class VAR(Token):
     pass
 
 
-@dataclass
+@dataclass(slots=True)
 class WHILE(Token):
     pass
 
 
-@dataclass
+@dataclass(slots=True)
 class EOF(Token):
     pass
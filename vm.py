@@ -0,0 +1,499 @@
+import sys
+from collections.abc import Callable
+from typing import Any
+
+from bytecode import (
+    ADD,
+    ADD_CONST,
+    ADD_NUM,
+    AND,
+    CHECK_GLOBAL,
+    CHECK_NUM,
+    CONST,
+    DEFINE_GLOBAL,
+    DEFINE_LOCAL,
+    DIV,
+    DIV_CONST,
+    DIV_NUM,
+    EQ,
+    EQ_SAME,
+    GE,
+    GE_CONST,
+    GE_NUM,
+    GT,
+    GT_CONST,
+    GT_NUM,
+    HALT,
+    JUMP,
+    JUMP_IF_FALSY,
+    JUMP_IF_LOOP_DONE,
+    LE,
+    LE_CONST,
+    LE_NUM,
+    LOAD_GLOBAL,
+    LOAD_LOCAL,
+    LT,
+    LT_CONST,
+    LT_NUM,
+    MUL,
+    MUL_CONST,
+    MUL_NUM,
+    NE,
+    NE_SAME,
+    NEG,
+    NEG_NUM,
+    NOT,
+    OR,
+    POP,
+    PRINT,
+    STORE_GLOBAL,
+    STORE_GLOBAL_POP,
+    STORE_LOCAL,
+    SUB,
+    SUB_CONST,
+    SUB_NUM,
+    Code,
+)
+from diagnostics import Diagnostics
+
+type Value = float | bool | str | None
+
+
+class TypeError(Exception):
+    def __init__(self, message: str, diag: Diagnostics):
+        super().__init__(message)
+        self.message: str = message
+        self.diagnostics: Diagnostics = diag
+
+
+class VariableError(Exception):
+    def __init__(self, message: str, diag: Diagnostics):
+        super().__init__(message)
+        self.message: str = message
+        self.diagnostics: Diagnostics = diag
+
+
+def _number_error(x: Value, diags: tuple[Diagnostics, ...]) -> TypeError:
+    # The left operand is checked first, like a tree-walking evaluator would.
+    return TypeError("Expected: number", diags[0] if type(x) is not float else diags[1])
+
+
+def _make_run() -> Callable[[Code, dict[str, Value]], Value]:
+    """
+    Returns the run() function. Its dispatch table is built here once, rather
+    than on every call, as run() is called for every line of the REPL and
+    every expression folded by the compiler.
+
+    Each opcode is run by a handler that returns the offset of the next
+    instruction. Indexing a list of handlers by opcode dispatches in one step,
+    where a chain of comparisons would test the opcodes one by one. The
+    handlers are closures over the state of the current run, which they read
+    as fast as local variables, and which run() sets on every call.
+    """
+    # The code being run.
+    ops: list[int] = []
+    names: list[str] = []
+    diags: dict[int, tuple[Diagnostics, ...]] = {}
+    # The constants and the operand stack. Their values are typed as Any,
+    # because the compiler, not the type checker, ensures that the unchecked
+    # operators only ever see numbers.
+    consts: list[Any] = []
+    stack: list[Any] = []
+    # The values of the local and the global variables.
+    slots: list[Any] = []
+    global_vars: dict[str, Value] = {}
+    push, pop = stack.append, stack.pop
+    write = sys.stdout.write
+
+    def const(ip: int) -> int:
+        push(consts[ops[ip + 1]])
+        return ip + 2
+
+    def load_global(ip: int) -> int:
+        try:
+            push(global_vars[names[ops[ip + 1]]])
+        except KeyError:
+            name = names[ops[ip + 1]]
+            raise VariableError(f"'{name}' not defined", diags[ip][0]) from None
+        return ip + 2
+
+    def store_global(ip: int) -> int:
+        name = names[ops[ip + 1]]
+        if name not in global_vars:
+            raise VariableError(
+                f"Variable {name} not declared (vars: {global_vars!r})", diags[ip][0]
+            )
+        global_vars[name] = stack[-1]
+        return ip + 2
+
+    def store_global_pop(ip: int) -> int:
+        name = names[ops[ip + 1]]
+        if name not in global_vars:
+            raise VariableError(
+                f"Variable {name} not declared (vars: {global_vars!r})", diags[ip][0]
+            )
+        global_vars[name] = pop()
+        return ip + 2
+
+    def define_global(ip: int) -> int:
+        global_vars[names[ops[ip + 1]]] = pop()
+        return ip + 2
+
+    def load_local(ip: int) -> int:
+        push(slots[ops[ip + 1]])
+        return ip + 2
+
+    def store_local(ip: int) -> int:
+        slots[ops[ip + 1]] = stack[-1]
+        return ip + 2
+
+    def define_local(ip: int) -> int:
+        slots[ops[ip + 1]] = pop()
+        return ip + 2
+
+    def neg(ip: int) -> int:
+        x = stack[-1]
+        if type(x) is not float:
+            raise TypeError("Expected: number", diags[ip][0])
+        stack[-1] = -x
+        return ip + 1
+
+    def not_(ip: int) -> int:
+        x = stack[-1]
+        if type(x) is not bool:
+            raise TypeError("Expected: bool", diags[ip][0])
+        stack[-1] = not x
+        return ip + 1
+
+    def add(ip: int) -> int:
+        y = pop()
+        x = stack[-1]
+        if type(x) is type(y) and (type(x) is float or type(x) is str):
+            stack[-1] = x + y
+        else:
+            raise TypeError("Operands must be two numbers or two strings", diags[ip][0])
+        return ip + 1
+
+    def sub(ip: int) -> int:
+        y = pop()
+        x = stack[-1]
+        if type(x) is not float or type(y) is not float:
+            raise _number_error(x, diags[ip])
+        stack[-1] = x - y
+        return ip + 1
+
+    def mul(ip: int) -> int:
+        y = pop()
+        x = stack[-1]
+        if type(x) is not float or type(y) is not float:
+            raise _number_error(x, diags[ip])
+        stack[-1] = x * y
+        return ip + 1
+
+    def div(ip: int) -> int:
+        y = pop()
+        x = stack[-1]
+        if type(x) is not float or type(y) is not float:
+            raise _number_error(x, diags[ip])
+        if y == 0:
+            raise TypeError("Division by zero", diags[ip][1])
+        stack[-1] = x / y
+        return ip + 1
+
+    def lt(ip: int) -> int:
+        y = pop()
+        x = stack[-1]
+        if type(x) is not float or type(y) is not float:
+            raise _number_error(x, diags[ip])
+        stack[-1] = x < y
+        return ip + 1
+
+    def le(ip: int) -> int:
+        y = pop()
+        x = stack[-1]
+        if type(x) is not float or type(y) is not float:
+            raise _number_error(x, diags[ip])
+        stack[-1] = x <= y
+        return ip + 1
+
+    def gt(ip: int) -> int:
+        y = pop()
+        x = stack[-1]
+        if type(x) is not float or type(y) is not float:
+            raise _number_error(x, diags[ip])
+        stack[-1] = x > y
+        return ip + 1
+
+    def ge(ip: int) -> int:
+        y = pop()
+        x = stack[-1]
+        if type(x) is not float or type(y) is not float:
+            raise _number_error(x, diags[ip])
+        stack[-1] = x >= y
+        return ip + 1
+
+    def eq(ip: int) -> int:
+        y = pop()
+        x = stack[-1]
+        if type(x) is not type(y):
+            raise TypeError(f"Cannot compare {type(x)} and {type(y)}", diags[ip][0])
+        stack[-1] = x == y
+        return ip + 1
+
+    def ne(ip: int) -> int:
+        y = pop()
+        x = stack[-1]
+        if type(x) is not type(y):
+            raise TypeError(f"Cannot compare {type(x)} and {type(y)}", diags[ip][0])
+        stack[-1] = x != y
+        return ip + 1
+
+    def eq_same(ip: int) -> int:
+        y = pop()
+        stack[-1] = stack[-1] == y
+        return ip + 1
+
+    def ne_same(ip: int) -> int:
+        y = pop()
+        stack[-1] = stack[-1] != y
+        return ip + 1
+
+    def neg_num(ip: int) -> int:
+        push(-pop())
+        return ip + 1
+
+    def add_num(ip: int) -> int:
+        y = pop()
+        stack[-1] += y
+        return ip + 1
+
+    def sub_num(ip: int) -> int:
+        y = pop()
+        stack[-1] -= y
+        return ip + 1
+
+    def mul_num(ip: int) -> int:
+        y = pop()
+        stack[-1] *= y
+        return ip + 1
+
+    def div_num(ip: int) -> int:
+        y = pop()
+        if y == 0:
+            raise TypeError("Division by zero", diags[ip][1])
+        stack[-1] /= y
+        return ip + 1
+
+    def lt_num(ip: int) -> int:
+        y = pop()
+        stack[-1] = stack[-1] < y
+        return ip + 1
+
+    def le_num(ip: int) -> int:
+        y = pop()
+        stack[-1] = stack[-1] <= y
+        return ip + 1
+
+    def gt_num(ip: int) -> int:
+        y = pop()
+        stack[-1] = stack[-1] > y
+        return ip + 1
+
+    def ge_num(ip: int) -> int:
+        y = pop()
+        stack[-1] = stack[-1] >= y
+        return ip + 1
+
+    def add_const(ip: int) -> int:
+        x = stack[-1]
+        if type(x) is not float:
+            raise TypeError("Operands must be two numbers or two strings", diags[ip][0])
+        stack[-1] = x + consts[ops[ip + 1]]
+        return ip + 2
+
+    def sub_const(ip: int) -> int:
+        x = stack[-1]
+        if type(x) is not float:
+            raise TypeError("Expected: number", diags[ip][0])
+        stack[-1] = x - consts[ops[ip + 1]]
+        return ip + 2
+
+    def mul_const(ip: int) -> int:
+        x = stack[-1]
+        if type(x) is not float:
+            raise TypeError("Expected: number", diags[ip][0])
+        stack[-1] = x * consts[ops[ip + 1]]
+        return ip + 2
+
+    def div_const(ip: int) -> int:
+        x = stack[-1]
+        if type(x) is not float:
+            raise TypeError("Expected: number", diags[ip][0])
+        stack[-1] = x / consts[ops[ip + 1]]
+        return ip + 2
+
+    def lt_const(ip: int) -> int:
+        x = stack[-1]
+        if type(x) is not float:
+            raise TypeError("Expected: number", diags[ip][0])
+        stack[-1] = x < consts[ops[ip + 1]]
+        return ip + 2
+
+    def le_const(ip: int) -> int:
+        x = stack[-1]
+        if type(x) is not float:
+            raise TypeError("Expected: number", diags[ip][0])
+        stack[-1] = x <= consts[ops[ip + 1]]
+        return ip + 2
+
+    def gt_const(ip: int) -> int:
+        x = stack[-1]
+        if type(x) is not float:
+            raise TypeError("Expected: number", diags[ip][0])
+        stack[-1] = x > consts[ops[ip + 1]]
+        return ip + 2
+
+    def ge_const(ip: int) -> int:
+        x = stack[-1]
+        if type(x) is not float:
+            raise TypeError("Expected: number", diags[ip][0])
+        stack[-1] = x >= consts[ops[ip + 1]]
+        return ip + 2
+
+    def check_num(ip: int) -> int:
+        if type(stack[-1]) is not float:
+            raise TypeError("Expected: number", diags[ip][0])
+        return ip + 1
+
+    def check_global(ip: int) -> int:
+        name = names[ops[ip + 1]]
+        if name not in global_vars:
+            raise VariableError(
+                f"Variable {name} not declared (vars: {global_vars!r})", diags[ip][0]
+            )
+        return ip + 2
+
+    def and_(ip: int) -> int:
+        if not stack[-1]:
+            stack[-1] = False
+            return ops[ip + 1]
+        pop()
+        return ip + 2
+
+    def or_(ip: int) -> int:
+        if stack[-1]:
+            stack[-1] = True
+            return ops[ip + 1]
+        pop()
+        return ip + 2
+
+    def jump(ip: int) -> int:
+        return ops[ip + 1]
+
+    def jump_if_falsy(ip: int) -> int:
+        x = pop()
+        return ops[ip + 1] if x is None or x is False else ip + 2
+
+    def jump_if_loop_done(ip: int) -> int:
+        # The loop ends on anything equal to nil or false, which in Python
+        # includes 0.
+        return ops[ip + 1] if pop() in (None, False) else ip + 2
+
+    def pop_(ip: int) -> int:
+        pop()
+        return ip + 1
+
+    def print_(ip: int) -> int:
+        # One write per line, without the keyword handling of print(). The
+        # stream buffers the writes itself unless it is interactive.
+        write(f"{pop()}\n")
+        return ip + 1
+
+    def unknown(ip: int) -> int:
+        raise RuntimeError(f"Unknown opcode {ops[ip]} at offset {ip}")
+
+    table: dict[int, Callable[[int], int]] = {
+        CONST: const,
+        LOAD_GLOBAL: load_global,
+        STORE_GLOBAL: store_global,
+        DEFINE_GLOBAL: define_global,
+        LOAD_LOCAL: load_local,
+        STORE_LOCAL: store_local,
+        DEFINE_LOCAL: define_local,
+        NEG: neg,
+        NOT: not_,
+        ADD: add,
+        SUB: sub,
+        MUL: mul,
+        DIV: div,
+        LT: lt,
+        LE: le,
+        GT: gt,
+        GE: ge,
+        EQ: eq,
+        NE: ne,
+        EQ_SAME: eq_same,
+        NE_SAME: ne_same,
+        NEG_NUM: neg_num,
+        ADD_NUM: add_num,
+        SUB_NUM: sub_num,
+        MUL_NUM: mul_num,
+        DIV_NUM: div_num,
+        LT_NUM: lt_num,
+        LE_NUM: le_num,
+        GT_NUM: gt_num,
+        GE_NUM: ge_num,
+        ADD_CONST: add_const,
+        SUB_CONST: sub_const,
+        MUL_CONST: mul_const,
+        DIV_CONST: div_const,
+        LT_CONST: lt_const,
+        LE_CONST: le_const,
+        GT_CONST: gt_const,
+        GE_CONST: ge_const,
+        STORE_GLOBAL_POP: store_global_pop,
+        CHECK_NUM: check_num,
+        CHECK_GLOBAL: check_global,
+        AND: and_,
+        OR: or_,
+        JUMP: jump,
+        JUMP_IF_FALSY: jump_if_falsy,
+        JUMP_IF_LOOP_DONE: jump_if_loop_done,
+        POP: pop_,
+        PRINT: print_,
+    }
+    handlers: list[Callable[[int], int]] = [unknown] * (max(table) + 1)
+    for op, handler in table.items():
+        handlers[op] = handler
+
+    def run(code: Code, globals: dict[str, Value]) -> Value:
+        """
+        Runs compiled code. Global global_vars are looked up and declared in
+        globals.
+
+        Returns the value of the code if it was compiled from an expression,
+        and None otherwise.
+        """
+        nonlocal ops, names, diags, consts, stack, slots, global_vars
+        nonlocal push, pop, write
+        # The state of any run this one is nested in, restored at the end.
+        outer = (ops, names, diags, consts, stack, slots, global_vars, write)
+        ops, names, diags, consts = code.ops, code.names, code.diags, code.consts
+        stack, slots, global_vars = [], [None] * code.n_locals, globals
+        push, pop = stack.append, stack.pop
+        # Looked up when the code runs, rather than when the module is
+        # imported, so that output goes to wherever sys.stdout points then.
+        write = sys.stdout.write
+        try:
+            ip = 0
+            while (op := ops[ip]) != HALT:
+                ip = handlers[op](ip)
+            return stack[-1] if stack else None
+        finally:
+            ops, names, diags, consts, stack, slots, global_vars, write = outer
+            push, pop = stack.append, stack.pop
+
+    return run
+
+
+run = _make_run()